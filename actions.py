@@ -0,0 +1,322 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from instrumentation import RollingHistogram
+
+DEFAULT_SCREEN = (1920, 1080)
+DEFAULT_VOLUME_RANGE = (-65.25, 0.0)    # dB, what pycaw reports for a typical endpoint
+ACTIONS = ("hotkey", "move_to", "scroll", "set_volume")
+
+# "auto": the native input path on Linux, pyautogui/pycaw elsewhere
+ACTION_BACKENDS = ("auto", "pyautogui", "linux", "null")
+DEFAULT_ACTIONS = "auto"
+
+# pyautogui key names -> X keysym names, where they differ
+XTEST_KEYS = {
+    "ctrl": "Control_L", "shift": "Shift_L", "alt": "Alt_L", "win": "Super_L",
+    "esc": "Escape", "enter": "Return", "backspace": "BackSpace", "delete": "Delete", "tab": "Tab",
+    "left": "Left", "right": "Right", "up": "Up", "down": "Down", "home": "Home", "end": "End",
+    "pageup": "Prior", "pagedown": "Next", "+": "plus", "-": "minus",
+}
+# pyautogui key names -> evdev KEY_* names, where they differ
+UINPUT_KEYS = {
+    "ctrl": "LEFTCTRL", "shift": "LEFTSHIFT", "alt": "LEFTALT", "win": "LEFTMETA",
+    "+": "EQUAL", "-": "MINUS",
+}
+FUNCTION_KEY = re.compile(r"f\d{1,2}$")
+
+
+class NullActions:
+    """
+    Action sink that performs nothing and logs what would have been sent.
+    Used for replays and benchmarks; wrapped in TimedActions it measures
+    the dispatch cost of each action without touching the OS.
+    """
+    def __init__(self, screen_size=DEFAULT_SCREEN, volume_range=DEFAULT_VOLUME_RANGE, log=True):
+        self.screen_size = screen_size
+        self.volume_range = volume_range
+        self.log = log
+        self.events = []
+        self.time = 0.0   # set by the caller to stamp logged events
+
+    def _record(self, *event):
+        if self.log:
+            self.events.append((self.time,) + event)
+
+    def hotkey(self, *keys):
+        self._record("hotkey", *keys)
+
+    def move_to(self, x, y):
+        self._record("move_to", x, y)
+
+    def scroll(self, clicks):
+        self._record("scroll", clicks)
+
+    def set_volume(self, level):
+        self._record("set_volume", round(float(level), 3))
+
+
+class PyAutoGuiActions:
+    """
+    Sends gesture actions to the OS through pyautogui and pycaw. Both are
+    imported and the audio endpoint activated here rather than on import,
+    so runs without OS actions never load them.
+    """
+    def __init__(self):
+        import pyautogui
+        from ctypes import cast, POINTER
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        self.pyautogui = pyautogui
+        interface = AudioUtilities.GetSpeakers().Activate(IAudioEndpointVolume._iid_, 0, None)
+        self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+        min_vol, max_vol = self.volume.GetVolumeRange()[:2]
+        self.volume_range = (min_vol, max_vol)
+        self.screen_size = tuple(pyautogui.size())
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+    def move_to(self, x, y):
+        # No per-call pause for continuous updates, it would cap the cursor at 10 Hz
+        self.pyautogui.moveTo(x, y, _pause=False)
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks, _pause=False)
+
+    def set_volume(self, level):
+        self.volume.SetMasterVolumeLevel(level, None)
+
+
+class XTestInput:
+    """Pointer and keys through the X server's XTest extension (python-xlib)."""
+    def __init__(self):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        self.X, self.XK, self.xtest = X, XK, xtest
+        self.display = display.Display()
+        screen = self.display.screen()
+        self.screen_size = (screen.width_in_pixels, screen.height_in_pixels)
+        self._codes = {}
+
+    def _code(self, key):
+        # Keycode for a pyautogui key name, 0 if the keyboard map has none
+        code = self._codes.get(key)
+        if code is None:
+            name = key.upper() if FUNCTION_KEY.match(key) else XTEST_KEYS.get(key, key)
+            code = self._codes[key] = self.display.keysym_to_keycode(self.XK.string_to_keysym(name))
+        return code
+
+    def hotkey(self, keys):
+        codes = [code for code in map(self._code, keys) if code]
+        for code in codes:
+            self.xtest.fake_input(self.display, self.X.KeyPress, code)
+        for code in reversed(codes):
+            self.xtest.fake_input(self.display, self.X.KeyRelease, code)
+        self.display.flush()
+
+    def move_to(self, x, y):
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=int(x), y=int(y))
+        self.display.flush()
+
+    def scroll(self, clicks):
+        # Buttons 4 and 5 are one wheel step up and down
+        button = 4 if clicks > 0 else 5
+        for _ in range(abs(int(clicks))):
+            self.xtest.fake_input(self.display, self.X.ButtonPress, button)
+            self.xtest.fake_input(self.display, self.X.ButtonRelease, button)
+        self.display.flush()
+
+    def close(self):
+        self.display.close()
+
+
+class UinputInput:
+    """
+    Pointer and keys through virtual uinput devices (python-evdev); needs
+    write access to /dev/uinput, but works without X (Wayland, console).
+    The pointer is absolute, its axes spanning `screen_size`.
+    """
+    def __init__(self, screen_size=DEFAULT_SCREEN):
+        from evdev import AbsInfo, UInput, ecodes
+        self.ecodes = ecodes
+        self.screen_size = tuple(screen_size)
+        width, height = self.screen_size
+        # Separate devices, so the compositor classifies each one correctly
+        self.keyboard = UInput({ecodes.EV_KEY: list(range(1, 249))}, name="gesture-control-keyboard")
+        self.pointer = UInput({
+            ecodes.EV_KEY: [ecodes.BTN_LEFT, ecodes.BTN_RIGHT],
+            ecodes.EV_REL: [ecodes.REL_WHEEL],
+            ecodes.EV_ABS: [(ecodes.ABS_X, AbsInfo(0, 0, width - 1, 0, 0, 0)),
+                            (ecodes.ABS_Y, AbsInfo(0, 0, height - 1, 0, 0, 0))],
+        }, name="gesture-control-pointer")
+
+    def _code(self, key):
+        return self.ecodes.ecodes.get("KEY_" + UINPUT_KEYS.get(key, key).upper())
+
+    def hotkey(self, keys):
+        codes = [code for code in map(self._code, keys) if code is not None]
+        for code in codes:
+            self.keyboard.write(self.ecodes.EV_KEY, code, 1)
+        self.keyboard.syn()
+        for code in reversed(codes):
+            self.keyboard.write(self.ecodes.EV_KEY, code, 0)
+        self.keyboard.syn()
+
+    def move_to(self, x, y):
+        self.pointer.write(self.ecodes.EV_ABS, self.ecodes.ABS_X, int(x))
+        self.pointer.write(self.ecodes.EV_ABS, self.ecodes.ABS_Y, int(y))
+        self.pointer.syn()
+
+    def scroll(self, clicks):
+        # One event for the whole delta; positive is up, like pyautogui
+        self.pointer.write(self.ecodes.EV_REL, self.ecodes.REL_WHEEL, int(clicks))
+        self.pointer.syn()
+
+    def close(self):
+        self.keyboard.close()
+        self.pointer.close()
+
+
+class LocalMixer:
+    """
+    Volume stand-in for hosts without a Windows audio endpoint. Keeps the
+    level in-process, in the dB range the gestures are calibrated for,
+    and applies it to the ALSA master only when it moves by a whole
+    percent: through one pyalsaaudio Mixer kept open for the whole run,
+    or by running `amixer` when pyalsaaudio is not installed.
+    """
+    def __init__(self, volume_range=DEFAULT_VOLUME_RANGE, control="Master", apply=True):
+        self.volume_range = volume_range
+        self.control = control
+        self.mixer = self._open_mixer(control) if apply else None
+        self.command = shutil.which("amixer") if apply and self.mixer is None else None
+        self.level = volume_range[1]
+        self.percent = None
+
+    @staticmethod
+    def _open_mixer(control):
+        try:
+            import alsaaudio
+        except ImportError:
+            return None
+        try:
+            return alsaaudio.Mixer(control)
+        except alsaaudio.ALSAAudioError:
+            return None
+
+    def set_volume(self, level):
+        low, high = self.volume_range
+        self.level = min(max(float(level), low), high)
+        percent = int(round((self.level - low) / (high - low) * 100))
+        if percent == self.percent or (self.mixer is None and self.command is None):
+            return
+        self.percent = percent
+        if self.mixer is not None:
+            self.mixer.setvolume(percent)
+        else:
+            subprocess.run([self.command, "-q", "sset", self.control, f"{percent}%"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+    def close(self):
+        if self.mixer is not None:
+            self.mixer.close()
+
+
+class LinuxActions:
+    """
+    Native Linux input: XTest when there is an X display, otherwise
+    uinput (`method` picks one explicitly). Each action is a few small
+    writes, without pyautogui's per-call screen queries and pauses.
+    Volume goes to a LocalMixer.
+    """
+    def __init__(self, method=None, screen_size=DEFAULT_SCREEN, mixer=None):
+        if method is None:
+            method = "xtest" if os.environ.get("DISPLAY") else "uinput"
+        self.method = method
+        self.input = XTestInput() if method == "xtest" else UinputInput(screen_size)
+        self.mixer = mixer if mixer is not None else LocalMixer()
+        self.screen_size = self.input.screen_size
+        self.volume_range = self.mixer.volume_range
+
+    def hotkey(self, *keys):
+        self.input.hotkey(keys)
+
+    def move_to(self, x, y):
+        self.input.move_to(x, y)
+
+    def scroll(self, clicks):
+        self.input.scroll(clicks)
+
+    def set_volume(self, level):
+        self.mixer.set_volume(level)
+
+    def close(self):
+        self.input.close()
+        close = getattr(self.mixer, "close", None)
+        if close is not None:
+            close()
+
+
+class TimedActions:
+    """
+    Same interface as the backend it wraps; counts every action and
+    keeps a rolling histogram of how long the backend took for it. Only
+    called from the ActionDispatcher thread.
+    """
+    def __init__(self, actions):
+        self.actions = actions
+        self.backend = type(actions).__name__
+        self.screen_size = actions.screen_size
+        self.volume_range = actions.volume_range
+        self.timings = {name: RollingHistogram() for name in ACTIONS}
+
+    def _call(self, name, *args):
+        start = time.perf_counter()
+        getattr(self.actions, name)(*args)
+        self.timings[name].add((time.perf_counter() - start) * 1000.0)
+
+    def hotkey(self, *keys):
+        self._call("hotkey", *keys)
+
+    def move_to(self, x, y):
+        self._call("move_to", x, y)
+
+    def scroll(self, clicks):
+        self._call("scroll", clicks)
+
+    def set_volume(self, level):
+        self._call("set_volume", level)
+
+    def stats(self):
+        stats = {"backend": self.backend}
+        for name, timing in self.timings.items():
+            p50, p95, p99 = timing.percentiles()
+            stats[name] = {"calls": timing.total_count, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        return stats
+
+    def close(self):
+        close = getattr(self.actions, "close", None)
+        if close is not None:
+            close()
+
+
+def create_actions(backend=DEFAULT_ACTIONS):
+    """
+    The action backend by name (see ACTION_BACKENDS), wrapped in
+    TimedActions. Backends import their OS libraries here, so only the
+    one in use is ever loaded.
+    """
+    if backend == "auto":
+        backend = "linux" if sys.platform.startswith("linux") else "pyautogui"
+    if backend == "pyautogui":
+        actions = PyAutoGuiActions()
+    elif backend == "linux":
+        actions = LinuxActions()
+    elif backend == "null":
+        actions = NullActions(log=False)
+    else:
+        raise ValueError(f"unknown action backend {backend!r}")
+    return TimedActions(actions)
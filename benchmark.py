@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import cv2 as cv
+from actions import NullActions, TimedActions
+from gestures import GestureController, detect_fingers, detect_pinch, calculate_distance
+from gesture_engine import SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED
+from gesture_templates import TemplateSet, prepare
+from trajectory import TrajectoryBuffer, detect_swipe
+from dispatcher import ActionDispatcher
+from landmark_trace import TraceReader
+from hand_detector import PATTERNS, SyntheticDetector, synthetic_hand
+from landmarks import results_to_array
+from replay import ReplaySource, MODE_FAST
+
+try:
+    import mediapipe as mp
+except ImportError:
+    mp = None
+
+
+def synthetic_session(num_frames, seed=0, hold=20, drift=0.02):
+    # Landmarks that hold each pattern for `hold` frames while drifting sideways, to trigger swipes
+    rng = np.random.default_rng(seed)
+    hands = np.empty((num_frames, 21, 3), dtype=np.float32)
+    for i in range(num_frames):
+        hands[i] = synthetic_hand(PATTERNS[(i // hold) % len(PATTERNS)], rng)
+        hands[i, :, 0] += drift * np.sin(i / 3.0)
+    return hands
+
+
+def synthetic_stroke(kind, rng, points=40, noise=0.004):
+    # Normalized fingertip x, y of a circle, checkmark or zig-zag drawn at a random pace
+    u = np.linspace(0.0, 1.0, points) ** rng.uniform(0.7, 1.4)
+    if kind == 0:
+        x, y = 0.5 + 0.08 * np.cos(2 * np.pi * u), 0.5 + 0.1 * np.sin(2 * np.pi * u)
+    elif kind == 1:
+        x, y = 0.4 + 0.2 * u, np.where(u < 0.33, 0.5 + 0.3 * u, 0.6 - 0.3 * (u - 0.33))
+    else:
+        x, y = 0.35 + 0.3 * u, 0.5 + 0.13 * np.abs((u * 4) % 2 - 1)
+    return x + rng.normal(0.0, noise, points), y + rng.normal(0.0, noise, points)
+
+
+def synthetic_video(path, num_frames=120, size=(640, 480), fps=30.0):
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"MJPG"), fps, size)
+    rng = np.random.default_rng(0)
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    for i in range(num_frames):
+        frame[:] = rng.integers(0, 40, frame.shape, dtype=np.uint8)
+        cv.circle(frame, (100 + 4 * i % (size[0] - 200), size[1] // 2), 60, (120, 160, 200), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def reset_peak_rss():
+    # Linux lets a process reset its own high-water mark; elsewhere peaks just accumulate
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    except ImportError:
+        return None
+
+
+def summarize(name, timings_ns, items=None, **extra):
+    timings_us = np.asarray(timings_ns, dtype=np.float64) / 1000.0
+    total_s = timings_us.sum() / 1e6
+    items = len(timings_us) if items is None else items
+    p50, p95, p99 = np.percentile(timings_us, (50, 95, 99)) if len(timings_us) else (0.0, 0.0, 0.0)
+    result = {
+        "name": name,
+        "iterations": int(len(timings_us)),
+        "frames_per_sec": items / total_s if total_s else 0.0,
+        "latency_us": {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+                       "mean": float(timings_us.mean()) if len(timings_us) else 0.0},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    result.update(extra)
+    return result
+
+
+def run_timed(name, fn, inputs, iterations, **extra):
+    """Call fn(input) `iterations` times, cycling through inputs, timing each call."""
+    reset_peak_rss()
+    timings = np.empty(iterations, dtype=np.int64)
+    count = len(inputs)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        arg = inputs[i % count]
+        start = clock()
+        fn(arg)
+        timings[i] = clock() - start
+    return summarize(name, timings, **extra)
+
+
+def skipped(name, reason):
+    return {"name": name, "skipped": reason}
+
+
+def bench_detect_fingers(hands, iterations):
+    return run_timed("detect_fingers", detect_fingers, hands, iterations)
+
+
+def bench_detect_swipe(hands, iterations, fps=30.0):
+    # One trajectory sample plus a swipe check over the window, per frame
+    tips = hands[:, 8, :2].tolist()
+    trajectory = TrajectoryBuffer()
+    clock = {"t": 0.0}
+
+    def step(tip):
+        clock["t"] += 1.0 / fps
+        trajectory.add(clock["t"], tip[0], tip[1])
+        detect_swipe(trajectory, clock["t"], SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED)
+
+    return run_timed("detect_swipe", step, tips, iterations)
+
+
+def bench_template_match(iterations, count=300, seed=0):
+    # One prepared live stroke against `count` templates, a third of them of the same shape
+    rng = np.random.default_rng(seed)
+    templates = TemplateSet([(str(i), prepare(*synthetic_stroke(i % 3, rng))) for i in range(count)])
+    queries = [prepare(*synthetic_stroke(i % 3, rng)) for i in range(30)]
+    return run_timed("template_match", templates.match, queries, iterations, templates=count)
+
+
+def bench_detect_pinch(hands, iterations):
+    pairs = [((int(h[8, 0] * 640), int(h[8, 1] * 480)), (int(h[4, 0] * 640), int(h[4, 1] * 480)))
+             for h in hands]
+    results = [run_timed("detect_pinch", lambda p: detect_pinch(p[0], p[1]), pairs, iterations),
+               run_timed("calculate_distance", lambda p: calculate_distance(p[0], p[1]), pairs, iterations)]
+    return results
+
+
+def bench_state_machine(hands, iterations, fps=30.0):
+    # The full per-hand gesture path with a null action sink, timestamps advancing at `fps`
+    controller = GestureController(NullActions(log=False))
+    clock = {"t": 0.0}
+
+    def step(hand):
+        clock["t"] += 1.0 / fps
+        controller.process(hand, clock["t"], (640, 480))
+
+    return run_timed("gesture_state_machine", step, hands, iterations)
+
+
+def bench_action_dispatch(hands, iterations, fps=30.0):
+    # The gesture path with its actions going through the ActionDispatcher thread into a timed
+    # null sink: gesture throughput including action handoff, plus the sink's per-action cost
+    sink = TimedActions(NullActions(log=False))
+    dispatcher = ActionDispatcher(sink)
+    dispatcher.start()
+    controller = GestureController(dispatcher)
+    clock = {"t": 0.0}
+
+    def step(hand):
+        clock["t"] += 1.0 / fps
+        controller.process(hand, clock["t"], (640, 480))
+
+    result = run_timed("action_dispatch", step, hands, iterations)
+    dispatcher.stop()
+    dispatcher.join()
+    result["actions"] = sink.stats()
+    result["coalesced"] = dispatcher.coalesced
+    return result
+
+
+def bench_synthetic_detector(iterations, batch):
+    # The synthetic backend's own cost with no simulated inference time: what a load test
+    # spends per frame on top of the latency it asks for
+    detector = SyntheticDetector(latency=0.0, overhead=0.0)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frames = [(stream, frame, 0.0, None) for stream in range(batch)]
+    result = run_timed(f"synthetic_detector_batch{batch}", detector.detect_batch, [frames], iterations)
+    result["frames_per_sec"] *= batch
+    result["detector"] = detector.stats()
+    return result
+
+
+def bench_trace(trace_path, iterations):
+    # Recorded landmarks through the state machine, one call per hand
+    reader = TraceReader(trace_path)
+    if len(reader.landmarks) == 0:
+        return skipped("trace_state_machine", "trace has no hands")
+    result = bench_state_machine(np.asarray(reader.landmarks), iterations)
+    result["name"] = "trace_state_machine"
+    result["trace"] = trace_path
+    return result
+
+
+def load_frames(video_path, limit=120):
+    source = ReplaySource(video_path, mode=MODE_FAST)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(cv.cvtColor(cv.flip(frame, 1), cv.COLOR_BGR2RGB))
+    source.release()
+    return frames
+
+
+def bench_hands_process(frames, iterations, complexity):
+    name = f"hands_process_complexity_{complexity}"
+    if mp is None:
+        return skipped(name, "mediapipe not installed")
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1,
+                                     min_detection_confidence=0.7, min_tracking_confidence=0.7,
+                                     model_complexity=complexity)
+    try:
+        hands.process(frames[0])   # graph warm-up is not part of the steady state
+        return run_timed(name, hands.process, frames, iterations)
+    finally:
+        hands.close()
+
+
+def bench_pipeline(video_path, complexity=1):
+    """
+    The replayed pipeline in one thread: decode, flip, convert, Hands.process
+    and the gesture state machine for every frame of the video.
+    """
+    name = "replay_pipeline"
+    if mp is None:
+        return skipped(name, "mediapipe not installed")
+    reset_peak_rss()
+    source = ReplaySource(video_path, mode=MODE_FAST)
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1,
+                                     min_detection_confidence=0.7, min_tracking_confidence=0.7,
+                                     model_complexity=complexity)
+    controller = GestureController(NullActions(log=False))
+    raw = None
+    bgr = rgb = None
+    timings = []
+    clock = time.perf_counter_ns
+    try:
+        while True:
+            start = clock()
+            ret, raw = source.read(raw)
+            if not ret:
+                break
+            if bgr is None or bgr.shape != raw.shape:
+                bgr, rgb = np.empty_like(raw), np.empty_like(raw)
+            cv.flip(raw, 1, dst=bgr)
+            cv.cvtColor(bgr, cv.COLOR_BGR2RGB, dst=rgb)
+            results = hands.process(rgb)
+            controller.process_hands(results_to_array(results), time.monotonic(), (bgr.shape[1], bgr.shape[0]))
+            timings.append(clock() - start)
+    finally:
+        hands.close()
+        source.release()
+    return summarize(name, timings, video=video_path, model_complexity=complexity)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    # Print frames/sec change per benchmark against an earlier report
+    with open(baseline_path) as file:
+        baseline = {b["name"]: b for b in json.load(file)["benchmarks"]}
+    for bench in current["benchmarks"]:
+        old = baseline.get(bench["name"])
+        if not old or "skipped" in bench or "skipped" in old:
+            continue
+        change = (bench["frames_per_sec"] / old["frames_per_sec"] - 1.0) * 100.0 if old["frames_per_sec"] else 0.0
+        print(f"{bench['name']:>32}: {old['frames_per_sec']:12.0f} -> {bench['frames_per_sec']:12.0f} fps "
+              f"({change:+.1f}%)", file=sys.stderr)
+
+
+def run(args):
+    hands = synthetic_session(args.synthetic_frames)
+    benchmarks = [bench_detect_fingers(hands, args.iterations), bench_detect_swipe(hands, args.iterations)]
+    benchmarks += bench_detect_pinch(hands, args.iterations)
+    # Milliseconds per call rather than microseconds: fewer iterations
+    benchmarks.append(bench_template_match(max(args.iterations // 100, 1)))
+    benchmarks.append(bench_state_machine(hands, args.iterations))
+    benchmarks.append(bench_action_dispatch(hands, args.iterations))
+    for batch in (1, 4):
+        benchmarks.append(bench_synthetic_detector(max(args.iterations // 10, 1), batch))
+    if args.trace:
+        benchmarks.append(bench_trace(args.trace, args.iterations))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video
+        if video is None:
+            video = os.path.join(tmp, "synthetic.avi")
+            synthetic_video(video)
+        frames = load_frames(video)
+        for complexity in (0, 1):
+            benchmarks.append(bench_hands_process(frames, args.inference_iterations, complexity))
+        benchmarks.append(bench_pipeline(video))
+
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv.__version__,
+        "mediapipe": getattr(mp, "__version__", None),
+        "benchmarks": benchmarks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark capture, inference and gesture classification")
+    parser.add_argument("--iterations", type=int, default=100000, help="calls per gesture-logic benchmark")
+    parser.add_argument("--inference-iterations", type=int, default=200, help="calls per Hands.process benchmark")
+    parser.add_argument("--synthetic-frames", type=int, default=1000, help="synthetic landmark frames to cycle through")
+    parser.add_argument("--trace", metavar="DIR", help="also benchmark a recorded landmark trace")
+    parser.add_argument("--video", metavar="PATH", help="recorded video for inference and pipeline runs")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            outfile.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import collections
+import sys
+import time
+import cv2 as cv
+import numpy as np
+from frame_buffers import FRAME_WIDTH, FRAME_HEIGHT
+from instrumentation import RollingHistogram
+
+CAMERA_FPS = 30
+DRIVER_BUFFERS = 1          # frames the driver may queue; more only adds latency
+MAX_DRAIN = 4               # stale frames skipped per read at most
+RATE_WINDOW = 60            # frames the delivered FPS is averaged over
+
+BACKENDS = {
+    "auto": cv.CAP_ANY,
+    "v4l2": cv.CAP_V4L2,
+    "dshow": cv.CAP_DSHOW,
+    "msmf": cv.CAP_MSMF,
+    "avfoundation": cv.CAP_AVFOUNDATION,
+}
+# On Linux V4L2 is the backend that honours the buffer count and reports driver timestamps
+DEFAULT_BACKEND = "v4l2" if sys.platform.startswith("linux") else "auto"
+PIXEL_FORMATS = {"mjpg": "MJPG", "yuyv": "YUYV"}
+
+
+class CameraSource:
+    """
+    Low-latency wrapper around cv.VideoCapture with the read()/release()
+    interface the capture thread uses.
+
+    Opens the camera with an explicit backend and pixel format and asks
+    the driver to queue at most `buffers` frames. `read` is split into
+    grab() and retrieve(): when the driver's timestamp shows the grabbed
+    frame is already more than half a frame period old, newer frames are
+    grabbed in its place, and only the one kept is decoded. `frame_time`
+    is the monotonic time the returned frame was captured (the driver's
+    timestamp where it has one, otherwise when grab() returned); `stats`
+    reports the delivered frame rate, frame age and skipped frames.
+    """
+    def __init__(self, index=0, backend=DEFAULT_BACKEND, pixel_format=None, size=(FRAME_WIDTH, FRAME_HEIGHT),
+                 fps=CAMERA_FPS, buffers=DRIVER_BUFFERS, cap=None):
+        self.index = index
+        self.backend = backend
+        self.pixel_format = pixel_format
+        # `cap` replaces the device, e.g. a SyntheticCamera
+        self.cap = cap if cap is not None else cv.VideoCapture(index, BACKENDS[backend])
+        if not self.cap.isOpened() and backend != "auto" and cap is None:
+            # Fall back to whatever OpenCV picks rather than failing on an unusual platform
+            self.cap = cv.VideoCapture(index)
+            self.backend = "auto"
+        # FOURCC must be set before the size: V4L2 picks the resolutions per format
+        if pixel_format is not None:
+            self.cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc(*PIXEL_FORMATS[pixel_format]))
+        self.set_resolution(size)
+        self.cap.set(cv.CAP_PROP_FPS, fps)
+        self.buffers = buffers if self.cap.set(cv.CAP_PROP_BUFFERSIZE, buffers) else None
+        self.fps = self.cap.get(cv.CAP_PROP_FPS) or fps
+        self.frame_time = 0.0
+        self.frames = 0
+        self.skipped = 0
+        self.ages = RollingHistogram()
+        self._delivered = collections.deque(maxlen=RATE_WINDOW)
+        self._driver_clock = None   # unknown until the first frame
+
+    def set_resolution(self, size):
+        self.cap.set(cv.CAP_PROP_FRAME_WIDTH, size[0])
+        self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, size[1])
+
+    def _grab(self):
+        # (ok, capture time) of the next frame in the driver queue
+        if not self.cap.grab():
+            return False, 0.0
+        grabbed = time.monotonic()
+        if self._driver_clock is not False:
+            # V4L2 reports the buffer timestamp on the monotonic clock; other backends report
+            # the stream position, which is recognised here and never trusted again
+            stamp = self.cap.get(cv.CAP_PROP_POS_MSEC) / 1000.0
+            plausible = 0.0 <= grabbed - stamp < 1.0
+            if self._driver_clock is None:
+                self._driver_clock = plausible
+            if self._driver_clock and plausible:
+                return True, stamp
+        return True, grabbed
+
+    def read(self, image=None):
+        ok, frame_time = self._grab()
+        if not ok:
+            return False, image
+        # Drop-oldest: a frame that waited in the queue is replaced by the newest one
+        stale = 0.5 / self.fps
+        drained = 0
+        while self._driver_clock and drained < MAX_DRAIN and time.monotonic() - frame_time > stale:
+            ok, newer = self._grab()
+            if not ok:
+                break
+            frame_time = newer
+            drained += 1
+        ok, image = self.cap.retrieve(image)
+        if not ok:
+            return False, image
+        now = time.monotonic()
+        self.skipped += drained
+        self.frames += 1
+        self.frame_time = frame_time
+        self.ages.add((now - frame_time) * 1000.0)
+        self._delivered.append(now)
+        return True, image
+
+    def delivered_fps(self):
+        # Frames actually handed out per second, over the last RATE_WINDOW frames
+        if len(self._delivered) < 2 or self._delivered[-1] <= self._delivered[0]:
+            return 0.0
+        return (len(self._delivered) - 1) / (self._delivered[-1] - self._delivered[0])
+
+    def stats(self):
+        p50, p95, p99 = self.ages.percentiles()
+        return {
+            "backend": self.backend,
+            "pixel_format": self.pixel_format,
+            "driver_buffers": self.buffers,
+            "driver_timestamps": bool(self._driver_clock),
+            "requested_fps": self.fps,
+            "delivered_fps": self.delivered_fps(),
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "age_ms": {"p50": p50, "p95": p95, "p99": p99},
+        }
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticCamera:
+    """
+    Stand-in for a V4L2 device with the subset of the cv.VideoCapture
+    interface CameraSource uses. Frames are produced in real time at
+    `fps` into a driver-style queue of CAP_PROP_BUFFERSIZE slots; while
+    the queue is full new frames are lost, so a slow reader gets old
+    frames exactly like from a real camera. CAP_PROP_POS_MSEC is the
+    monotonic capture time of the last grabbed frame, in milliseconds.
+    """
+    def __init__(self, size=(FRAME_WIDTH, FRAME_HEIGHT), fps=CAMERA_FPS, buffers=4):
+        self.size = size
+        self.fps = fps
+        self.buffers = buffers
+        self.start = time.monotonic()
+        self._queue = collections.deque()
+        self._produced = 0        # frames the "sensor" has produced so far
+        self._grabbed = None      # (index, capture time) of the last grabbed frame
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, prop, value):
+        if prop == cv.CAP_PROP_FRAME_WIDTH:
+            self.size = (int(value), self.size[1])
+        elif prop == cv.CAP_PROP_FRAME_HEIGHT:
+            self.size = (self.size[0], int(value))
+        elif prop == cv.CAP_PROP_FPS:
+            self.fps = float(value)
+        elif prop == cv.CAP_PROP_BUFFERSIZE:
+            self.buffers = max(int(value), 1)
+        elif prop != cv.CAP_PROP_FOURCC:
+            return False
+        return True
+
+    def get(self, prop):
+        if prop == cv.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv.CAP_PROP_POS_MSEC:
+            return self._grabbed[1] * 1000.0 if self._grabbed else 0.0
+        if prop == cv.CAP_PROP_FRAME_WIDTH:
+            return self.size[0]
+        if prop == cv.CAP_PROP_FRAME_HEIGHT:
+            return self.size[1]
+        return 0.0
+
+    def _fill(self, now):
+        # Frames produced since the last call go into free queue slots; the rest are lost
+        produced = int((now - self.start) * self.fps) + 1
+        for index in range(self._produced, produced):
+            if len(self._queue) < self.buffers:
+                self._queue.append((index, self.start + index / self.fps))
+        self._produced = max(self._produced, produced)
+
+    def grab(self):
+        if not self._opened:
+            return False
+        self._fill(time.monotonic())
+        if not self._queue:
+            # Block until the sensor delivers the next frame
+            time.sleep(max(self.start + self._produced / self.fps - time.monotonic(), 0.0))
+            self._fill(time.monotonic())
+        self._grabbed = self._queue.popleft()
+        return True
+
+    def retrieve(self, image=None):
+        if self._grabbed is None:
+            return False, image
+        width, height = self.size
+        if image is None or image.shape != (height, width, 3):
+            image = np.empty((height, width, 3), dtype=np.uint8)
+        index = self._grabbed[0]
+        image[:] = 40
+        # A disc that crosses the frame once every two seconds, plus the frame number
+        x = int(index % (2 * self.fps) / (2 * self.fps) * width)
+        cv.circle(image, (x, height // 2), height // 8, (120, 160, 200), -1)
+        cv.putText(image, str(index), (10, height - 10), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        return True, image
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, image
+        return self.retrieve(image)
+
+    def release(self):
+        self._opened = False
@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+import time
+from gesture_engine import GestureBindings, CONFIG_PATH, DEFAULT_BINDINGS
+
+POLL_INTERVAL = 0.25   # seconds between mtime checks
+DEBOUNCE = 0.2         # the file must stay unchanged this long before it is read
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Watches mappings.json and swaps new GestureBindings into the running
+    pipeline, so "Save Configuration" in the settings GUI takes effect
+    without a restart.
+
+    Polls the file's mtime and size (cheap, and works the same on every
+    platform); after a change it waits for DEBOUNCE seconds without
+    further changes, then parses and compiles the file on this thread.
+    Subscribers get the new immutable bindings object; publishing is a
+    single attribute assignment, so the per-frame code reads `bindings`
+    without a lock. A file that fails to parse or validate is reported
+    and the previous bindings stay in effect.
+    """
+    def __init__(self, path=CONFIG_PATH, is_running=lambda: True, interval=POLL_INTERVAL, debounce=DEBOUNCE):
+        super().__init__(daemon=True)
+        self.path = path
+        self.is_running = is_running
+        self.interval = interval
+        self.debounce = debounce
+        self._subscribers = []
+        self._signature = self._stat()
+        self.bindings = self._load() or DEFAULT_BINDINGS
+        self.reloads = 0
+        self.errors = 0
+
+    def subscribe(self, callback):
+        # callback(bindings) runs on the watcher thread; it should only store the object
+        self._subscribers.append(callback)
+        callback(self.bindings)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as file:
+                return GestureBindings(json.load(file))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, KeyError) as error:
+            # json.JSONDecodeError is a ValueError too
+            self.errors += 1
+            print(f"Ignoring invalid {self.path}: {error}")
+            return None
+
+    def run(self):
+        while self.is_running():
+            time.sleep(self.interval)
+            signature = self._stat()
+            if signature == self._signature:
+                continue
+            # Debounce: wait until the writer is done
+            while self.is_running():
+                time.sleep(self.debounce)
+                settled = self._stat()
+                if settled == signature:
+                    break
+                signature = settled
+            self._signature = signature
+            bindings = self._load()
+            if bindings is None:
+                continue
+            self.bindings = bindings
+            self.reloads += 1
+            for callback in self._subscribers:
+                callback(bindings)
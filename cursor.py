@@ -0,0 +1,247 @@
+import math
+import threading
+import time
+
+FILTER_NONE = "none"
+FILTER_ONE_EURO = "one_euro"
+FILTER_KALMAN = "kalman"
+CURSOR_FILTERS = (FILTER_NONE, FILTER_ONE_EURO, FILTER_KALMAN)
+
+# Per-axis tuning in normalized image units (0..1); the camera is wider than tall, so y gets
+# slightly more smoothing for the same on-screen jitter
+CURSOR_FILTER_SETTINGS = {
+    FILTER_ONE_EURO: {
+        "x": {"min_cutoff": 1.2, "beta": 8.0, "d_cutoff": 1.0},
+        "y": {"min_cutoff": 1.0, "beta": 6.0, "d_cutoff": 1.0},
+    },
+    FILTER_KALMAN: {
+        "x": {"process_noise": 4.0, "measurement_noise": 3e-5},
+        "y": {"process_noise": 3.0, "measurement_noise": 4e-5},
+    },
+}
+MAX_LEAD = 0.1      # never extrapolate further than this many seconds
+RESET_GAP = 0.5     # a gap this long between samples starts the filter over
+EMIT_RATE = 120.0   # cursor moves per second from CursorEmitter
+STALE_AFTER = 0.25  # CursorEmitter stops moving the cursor when samples are older than this
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al.) for one axis: a low-pass whose cutoff
+    rises with speed, so slow movement is smooth and fast movement lags
+    little. The filtered derivative doubles as the velocity for prediction.
+    """
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = 0.0
+        self.t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x, t):
+        if self.t is None:
+            self.x, self.dx, self.t = x, 0.0, t
+            return x
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx = a_d * (x - self.x) / dt + (1.0 - a_d) * self.dx
+        a = self._alpha(self.min_cutoff + self.beta * abs(self.dx), dt)
+        self.x = a * x + (1.0 - a) * self.x
+        self.t = t
+        return self.x
+
+    def predict(self, lead):
+        return self.x + self.dx * lead
+
+
+class KalmanFilter1D:
+    """
+    Constant-velocity Kalman filter for one axis. State is (position,
+    velocity); `process_noise` is the white-acceleration spectral density
+    and `measurement_noise` the landmark position variance.
+    """
+    def __init__(self, process_noise=4.0, measurement_noise=3e-5):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = 0.0
+        self.t = None
+        # Covariance [[p00, p01], [p01, p11]]
+        self.p00, self.p01, self.p11 = self.r, 0.0, 1.0
+
+    def update(self, z, t):
+        if self.t is None:
+            self.x, self.t = z, t
+            return z
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        # Predict
+        x = self.x + self.v * dt
+        q = self.q
+        p00 = self.p00 + dt * (2.0 * self.p01 + dt * self.p11) + q * dt ** 3 / 3.0
+        p01 = self.p01 + dt * self.p11 + q * dt ** 2 / 2.0
+        p11 = self.p11 + q * dt
+        # Update
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        residual = z - x
+        self.x = x + k0 * residual
+        self.v = self.v + k1 * residual
+        self.p00, self.p01, self.p11 = (1.0 - k0) * p00, (1.0 - k0) * p01, p11 - k1 * p01
+        self.t = t
+        return self.x
+
+    def predict(self, lead):
+        return self.x + self.v * lead
+
+
+def make_axis_filter(kind, settings):
+    if kind == FILTER_ONE_EURO:
+        return OneEuroFilter(**settings)
+    if kind == FILTER_KALMAN:
+        return KalmanFilter1D(**settings)
+    raise ValueError(f"Unknown cursor filter: {kind}")
+
+
+class CursorFilter:
+    """
+    Smooths the fingertip per axis and extrapolates it by `lead_time`, the
+    measured delay between capture and the cursor actually moving, so the
+    cursor shows where the finger is now rather than where it was.
+    """
+    def __init__(self, kind=FILTER_ONE_EURO, settings=None, max_lead=MAX_LEAD):
+        settings = settings or CURSOR_FILTER_SETTINGS[kind]
+        self.kind = kind
+        self.axes = (make_axis_filter(kind, settings["x"]), make_axis_filter(kind, settings["y"]))
+        self.max_lead = max_lead
+        self.lead_time = 0.0
+        self.last_time = None
+
+    def reset(self):
+        for axis in self.axes:
+            axis.reset()
+        self.last_time = None
+
+    def update(self, x, y, t):
+        # Normalized (x, y) sample at capture time t -> filtered and predicted (x, y), clamped to the image
+        if self.last_time is not None and t - self.last_time > RESET_GAP:
+            self.reset()
+        self.last_time = t
+        fx, fy = self.axes
+        fx.update(x, t)
+        fy.update(y, t)
+        lead = min(max(self.lead_time, 0.0), self.max_lead)
+        return (min(max(fx.predict(lead), 0.0), 1.0),
+                min(max(fy.predict(lead), 0.0), 1.0))
+
+    def position(self):
+        # Filtered (x, y) at the last sample, without prediction
+        fx, fy = self.axes
+        return fx.x, fy.x
+
+    def velocity(self):
+        fx, fy = self.axes
+        if self.kind == FILTER_KALMAN:
+            return fx.v, fy.v
+        return fx.dx, fy.dx
+
+
+class CursorEmitter(threading.Thread):
+    """
+    Moves the cursor at a fixed rate (e.g. 120 Hz) regardless of how often
+    inference produces a fingertip sample.
+
+    Each tick extrapolates the latest sample along its velocity to the
+    current time plus `lead_offset` (the OS dispatch delay), capped at
+    MAX_LEAD. When a new sample arrives the output blends from where the
+    cursor is towards the new track over one sample interval, so it does
+    not jump. Stops when `is_running()` turns false.
+    """
+    def __init__(self, actions, is_running, rate=EMIT_RATE, max_lead=MAX_LEAD):
+        super().__init__(daemon=True)
+        self.actions = actions
+        self.is_running = is_running
+        self.period = 1.0 / rate
+        self.max_lead = max_lead
+        self.lead_offset = 0.0
+        self.screen_width, self.screen_height = actions.screen_size
+
+        self._lock = threading.Lock()
+        self._sample = None          # (x, y, vx, vy, capture time, arrival time, blend period)
+        self._previous = None        # last raw (x, y, t) pushed, for velocity when none is given
+        self._output = None          # last emitted normalized (x, y)
+        self._blend_from = None
+        self._last_target = None
+        self.emitted = 0
+
+    def push(self, x, y, t, velocity=None):
+        """Hand over a (filtered) normalized fingertip sample captured at time t."""
+        with self._lock:
+            previous = self._previous
+            if velocity is None:
+                if previous is not None and 0 < t - previous[2] < RESET_GAP:
+                    dt = t - previous[2]
+                    velocity = ((x - previous[0]) / dt, (y - previous[1]) / dt)
+                else:
+                    velocity = (0.0, 0.0)
+            interval = t - previous[2] if previous is not None and 0 < t - previous[2] < RESET_GAP else self.period
+            self._previous = (x, y, t)
+            self._blend_from = self._output
+            self._sample = (x, y, velocity[0], velocity[1], t, time.monotonic(), interval)
+
+    def release(self):
+        # Stop driving the cursor until the next sample (e.g. cursor mode left)
+        with self._lock:
+            self._sample = None
+            self._previous = None
+            self._output = None
+            self._blend_from = None
+
+    def _position(self, now):
+        x, y, vx, vy, t, arrived, interval = self._sample
+        lead = min(max(now - t + self.lead_offset, 0.0), self.max_lead)
+        track_x, track_y = x + vx * lead, y + vy * lead
+        if self._blend_from is None:
+            return track_x, track_y
+        alpha = min((now - arrived) / interval, 1.0)
+        from_x, from_y = self._blend_from
+        return from_x + (track_x - from_x) * alpha, from_y + (track_y - from_y) * alpha
+
+    def run(self):
+        next_tick = time.monotonic()
+        while self.is_running():
+            now = time.monotonic()
+            target = None
+            with self._lock:
+                if self._sample is not None and now - self._sample[4] < STALE_AFTER:
+                    px, py = self._position(now)
+                    px, py = min(max(px, 0.0), 1.0), min(max(py, 0.0), 1.0)
+                    self._output = (px, py)
+                    target = (int(px * self.screen_width), int(py * self.screen_height))
+            if target is not None and target != self._last_target:
+                self.actions.move_to(*target)
+                self._last_target = target
+                self.emitted += 1
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (e.g. a stall); resynchronise instead of bursting
+                next_tick = time.monotonic()
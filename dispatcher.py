@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+
+MAX_PENDING_EVENTS = 64
+
+
+class ActionDispatcher(threading.Thread):
+    """
+    Runs OS actions on its own thread so gesture recognition never blocks on
+    input injection. Offers the same interface as the actions object it
+    wraps, so GestureController can use either.
+
+    Continuous actions are coalesced while the thread is busy: only the
+    latest cursor target and volume level are kept and scroll deltas are
+    summed. Discrete actions (hotkeys) go through a bounded FIFO and run
+    strictly in order, after the pending continuous updates.
+
+    `set_origin` tags the actions that follow with the capture time of
+    the frame they come from and the metrics of its stream; "total"
+    (camera to OS action) is recorded there when the OS call returns.
+    A coalesced update keeps the origin of its latest value, a summed
+    scroll that of its oldest part.
+
+    A failing OS call (e.g. pyautogui's fail-safe, an X or uinput write
+    error) is reported and counted in `failed`; the thread keeps
+    sending everything after it.
+    """
+    def __init__(self, actions, metrics=None, max_pending=MAX_PENDING_EVENTS):
+        super().__init__(daemon=True)
+        self.actions = actions
+        self.metrics = metrics
+        self.screen_size = actions.screen_size
+        self.volume_range = actions.volume_range
+
+        self._cond = threading.Condition()
+        self._events = deque()
+        self._max_pending = max_pending
+        self._cursor = None
+        self._scroll = 0
+        self._volume = None
+        self._first_pending = None   # enqueue time of the oldest update not yet sent
+        self._origin = None          # (capture time, metrics) of the frame being handled
+        self._scroll_origin = None
+        self._running = True
+
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self._reported = set()   # actions whose failure was already printed
+
+    def _mark_pending(self):
+        if self._first_pending is None:
+            self._first_pending = time.monotonic()
+        self._cond.notify()
+
+    # Producer side, called from the gesture loop; never blocks on the OS
+
+    def set_origin(self, captured, metrics=None):
+        # Capture time (T_CAPTURED) of the frame whose actions come next, and where to record "total"
+        self._origin = (captured, metrics)
+
+    def hotkey(self, *keys):
+        with self._cond:
+            if len(self._events) >= self._max_pending:
+                self.dropped += 1
+                return
+            self._events.append((keys, self._origin))
+            self._mark_pending()
+
+    def move_to(self, x, y):
+        with self._cond:
+            if self._cursor is not None:
+                self.coalesced += 1
+            self._cursor = (x, y, self._origin)
+            self._mark_pending()
+
+    def scroll(self, clicks):
+        with self._cond:
+            if self._scroll:
+                self.coalesced += 1
+            else:
+                self._scroll_origin = self._origin
+            self._scroll += clicks
+            self._mark_pending()
+
+    def set_volume(self, level):
+        with self._cond:
+            if self._volume is not None:
+                self.coalesced += 1
+            self._volume = (level, self._origin)
+            self._mark_pending()
+
+    # Consumer side
+
+    def _has_work(self):
+        return self._events or self._cursor is not None or self._scroll or self._volume is not None
+
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._has_work() or not self._running)
+                if not self._running and not self._has_work():
+                    return
+                events, self._events = self._events, deque()
+                cursor, self._cursor = self._cursor, None
+                scroll, self._scroll = self._scroll, 0
+                scroll_origin, self._scroll_origin = self._scroll_origin, None
+                volume, self._volume = self._volume, None
+                queued_at, self._first_pending = self._first_pending, None
+
+            start = time.monotonic()
+            if cursor is not None:
+                self._call(self.actions.move_to, cursor[2], cursor[0], cursor[1])
+            if scroll:
+                self._call(self.actions.scroll, scroll_origin, scroll)
+            if volume is not None:
+                self._call(self.actions.set_volume, volume[1], volume[0])
+            for keys, origin in events:
+                self._call(self.actions.hotkey, origin, *keys)
+            if self.metrics is not None:
+                end = time.monotonic()
+                self.metrics.record("os_queue", start - queued_at)
+                self.metrics.record("os_call", end - start)
+
+    def _call(self, action, origin, *args):
+        try:
+            action(*args)
+            if origin is not None and origin[1] is not None:
+                origin[1].record("total", time.monotonic() - origin[0])
+        except Exception as error:
+            self.failed += 1
+            # Once per action, a cursor stuck in a corner would fail at the full cursor rate
+            if action.__name__ not in self._reported:
+                self._reported.add(action.__name__)
+                print(f"Action {action.__name__}{args} failed: {error!r}")
+
+    def stop(self):
+        # Pending actions are still flushed before the thread exits
+        with self._cond:
+            self._running = False
+            self._cond.notify()
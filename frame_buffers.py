@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from instrumentation import new_stamps
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+RING_SIZE = 6
+
+
+class FrameBuffer:
+    """
+    One preallocated BGR/RGB buffer pair owned by a FrameRing, plus the
+    per-stage timestamps of the frame it currently holds.
+    Reference counted: whoever holds it must release() it when done.
+    """
+    __slots__ = ("ring", "index", "bgr", "rgb", "stamps", "refs")
+
+    def __init__(self, ring, index, shape):
+        self.ring = ring
+        self.index = index
+        self.bgr = np.empty(shape, dtype=np.uint8)
+        self.rgb = np.empty(shape, dtype=np.uint8)
+        self.stamps = new_stamps()
+        self.refs = 0
+
+    def ensure_shape(self, shape):
+        # Only reallocates when the capture resolution changes, never in steady state
+        if self.bgr.shape != shape:
+            self.bgr = np.empty(shape, dtype=np.uint8)
+            self.rgb = np.empty(shape, dtype=np.uint8)
+
+    def retain(self):
+        self.ring.retain(self)
+        return self
+
+    def release(self):
+        self.ring.release(self)
+
+
+class FrameRing:
+    """
+    Fixed pool of frame buffers shared by capture, inference and render.
+    Capture acquires a free buffer, fills it in place and hands it on;
+    the buffer returns to the pool once every holder has released it.
+    """
+    def __init__(self, size=RING_SIZE, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        shape = (height, width, 3)
+        self._lock = threading.Condition()
+        self.buffers = [FrameBuffer(self, i, shape) for i in range(size)]
+        self._free = deque(self.buffers)
+        self.dropped = 0
+
+    def acquire(self, timeout=0):
+        # Returns a buffer with one reference, or None when every buffer stays borrowed for `timeout`
+        with self._lock:
+            if timeout and not self._free:
+                self._lock.wait_for(lambda: self._free, timeout)
+            if not self._free:
+                self.dropped += 1
+                return None
+            buf = self._free.popleft()
+            buf.refs = 1
+            buf.stamps.fill(0.0)
+            return buf
+
+    def retain(self, buf):
+        with self._lock:
+            buf.refs += 1
+
+    def release(self, buf):
+        with self._lock:
+            buf.refs -= 1
+            if buf.refs == 0:
+                self._free.append(buf)
+                self._lock.notify()
+
+    def free_count(self):
+        with self._lock:
+            return len(self._free)
+
+
+class FrameSlot:
+    """
+    Single-value handoff between threads. Every publish bumps a sequence
+    number and wakes waiters, so consumers only see each value once.
+
+    Optional retain/release hooks let the slot hold a reference on pooled
+    values: the slot keeps one reference on its current value, and hands an
+    extra one to every reader (taken under the lock, so the value cannot be
+    recycled in between). `on_publish`, if set, is called after every
+    publish outside the lock, e.g. to wake a scheduler watching many slots.
+    """
+    def __init__(self, retain=None, release=None):
+        self._cond = threading.Condition()
+        self._retain = retain
+        self._release = release
+        self.on_publish = None
+        self.seq = 0
+        self.taken_seq = 0
+        self.timestamp = 0.0
+        self.value = None
+
+    def publish(self, value, seq=None, timestamp=None):
+        # Ownership of the caller's reference on `value` passes to the slot
+        with self._cond:
+            previous = self.value
+            self.seq = self.seq + 1 if seq is None else seq
+            self.timestamp = time.monotonic() if timestamp is None else timestamp
+            self.value = value
+            self._cond.notify_all()
+            seq = self.seq
+        if previous is not None and self._release is not None:
+            self._release(previous)
+        if self.on_publish is not None:
+            self.on_publish()
+        return seq
+
+    def _take(self):
+        if self.value is not None and self._retain is not None:
+            self._retain(self.value)
+        if self.taken_seq != self.seq:
+            self.taken_seq = self.seq
+            self._cond.notify_all()
+        return self.seq, self.timestamp, self.value
+
+    def latest(self):
+        with self._cond:
+            return self._take()
+
+    def wait_newer(self, last_seq, timeout=None):
+        # Returns (seq, timestamp, value), or None on timeout so callers can re-check `running`
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq != last_seq, timeout):
+                return None
+            return self._take()
+
+    def wait_taken(self, seq, timeout=None):
+        # Lossless producers call this before publishing over `seq`; False on timeout
+        with self._cond:
+            return self._cond.wait_for(lambda: self.taken_seq >= seq, timeout)
+
+    def clear(self):
+        with self._cond:
+            previous, self.value = self.value, None
+        if previous is not None and self._release is not None:
+            self._release(previous)
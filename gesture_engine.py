@@ -0,0 +1,178 @@
+import json
+import os
+import stat
+import tempfile
+from gesture_templates import TEMPLATE_POINTS, TemplateSet, normalize, resample
+from landmarks import pattern_mask
+
+CONFIG_PATH = "mappings.json"
+
+# Reference values: at the default settings the thresholds are the original pixel constants
+PINCH_THRESHOLD = 30        # pixels at pinch_threshold == DEFAULT_PINCH_SETTING
+# Swipes are measured over time in frame widths, so they do not depend on the frame rate;
+# distance and speed are for swipe_sensitivity == DEFAULT_SWIPE_SENSITIVITY
+SWIPE_WINDOW = 0.3          # seconds of fingertip trajectory a swipe is looked for in
+SWIPE_DISTANCE = 0.15       # horizontal travel within the window
+SWIPE_SPEED = 0.8           # mean horizontal speed, widths per second
+DEFAULT_PINCH_SETTING = 0.7
+DEFAULT_SWIPE_SENSITIVITY = 0.5
+DOUBLE_TAP_WINDOW = 0.6     # seconds between the two pinches of a double tap
+
+# What the named actions of mappings.json send; anything else is read as a hotkey like "ctrl+shift+m"
+ACTION_HOTKEYS = {
+    "Open Menu": ("space",),
+    "Close Menu": ("esc",),
+    "Next": ("ctrl", "right"),
+    "Previous": ("ctrl", "left"),
+}
+
+# mappings.json gesture name -> event the controller detects
+GESTURE_EVENTS = {
+    "Tap": "tap",
+    "Double Tap": "double_tap",
+    "Swipe Left": "swipe_left",
+    "Swipe Right": "swipe_right",
+}
+
+# mappings.json mode name -> controller mode and the finger pattern that enters it
+MODES = {
+    "Volume Control": ("Volume", [1, 1, 0, 0, 0]),
+    "Scroll Page": ("Scroll", [0, 1, 1, 0, 0]),
+    "Cursor Mode": ("Cursor", [0, 1, 0, 0, 0]),
+}
+
+# Bindings used without a config file: the behaviour from before the config existed
+DEFAULT_CONFIG = {
+    "mappings": {"Tap": "space", "Swipe Left": "ctrl+left", "Swipe Right": "ctrl+right"},
+    "modes": {name: 1 for name in MODES},
+    "gesture_settings": {
+        "swipe_sensitivity": DEFAULT_SWIPE_SENSITIVITY,
+        "pinch_threshold": DEFAULT_PINCH_SETTING,
+        "gesture_timeout": 1.0,
+        "enable_feedback": 1,
+    },
+}
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_config(config, path=CONFIG_PATH):
+    # Write to a temp file next to the config and rename it over, so the running
+    # recognizer (which watches this file) never reads a half-written JSON
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".mappings-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as outfile:
+            json.dump(config, outfile, indent=4)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        # mkstemp creates the file 0600; keep the mode the config had, or the usual 0644
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def validate_config(config):
+    """Raise ValueError if `config` is not something GestureBindings can compile."""
+    if not isinstance(config, dict):
+        raise ValueError("config must be a JSON object")
+    for section in ("mappings", "modes", "gesture_settings"):
+        if not isinstance(config.get(section, {}), dict):
+            raise ValueError(f"'{section}' must be an object")
+    for gesture, action in config.get("mappings", {}).items():
+        if action is not None and not isinstance(action, str):
+            raise ValueError(f"mapping for '{gesture}' must be a string")
+    settings = config.get("gesture_settings", {})
+    for key in DEFAULT_CONFIG["gesture_settings"]:
+        if key in settings and (isinstance(settings[key], bool) or not isinstance(settings[key], (int, float))):
+            raise ValueError(f"gesture setting '{key}' must be a number")
+    for key in ("pinch_threshold", "swipe_sensitivity", "gesture_timeout"):
+        if key in settings and settings[key] <= 0:
+            raise ValueError(f"gesture setting '{key}' must be positive")
+    custom = settings.get("custom_gestures", {})
+    if not isinstance(custom, dict):
+        raise ValueError("'custom_gestures' must be an object")
+    for name, templates in custom.items():
+        if name in GESTURE_EVENTS:
+            raise ValueError(f"custom gesture '{name}' shadows a built-in gesture")
+        if not isinstance(templates, list):
+            raise ValueError(f"custom gesture '{name}' must be a list of templates")
+        for template in templates:
+            if (not isinstance(template, list) or len(template) < 2
+                    or not all(isinstance(p, list) and len(p) == 2 for p in template)):
+                raise ValueError(f"templates of custom gesture '{name}' must be lists of [x, y] points")
+
+
+def action_hotkey(action):
+    # Key tuple for hotkey(), or None for an empty / "None" mapping
+    if not action or action == "None":
+        return None
+    if action in ACTION_HOTKEYS:
+        return ACTION_HOTKEYS[action]
+    return tuple(key.strip().lower() for key in action.split("+") if key.strip())
+
+
+class GestureBindings:
+    """
+    A gesture configuration compiled into what the controller checks per
+    frame: pinch and swipe thresholds and cooldowns as plain numbers, the
+    enabled mode patterns as a finger-mask -> mode dict, and per event the
+    key tuple to send. Unmapped gestures are None and disabled modes are
+    absent, so the controller skips them without any work. Custom
+    gestures with a mapping become one TemplateSet (None without any).
+    Never modified after construction; a new config means new bindings.
+    """
+    def __init__(self, config):
+        validate_config(config)
+        settings = dict(DEFAULT_CONFIG["gesture_settings"])
+        settings.update(config.get("gesture_settings", {}))
+        mappings = config.get("mappings", {})
+        modes = config.get("modes", {})
+
+        self.pinch_threshold = PINCH_THRESHOLD * float(settings["pinch_threshold"]) / DEFAULT_PINCH_SETTING
+        # Higher sensitivity: shorter, slower movements count as swipes
+        swipe_scale = DEFAULT_SWIPE_SENSITIVITY / float(settings["swipe_sensitivity"])
+        self.swipe_distance = SWIPE_DISTANCE * swipe_scale
+        self.swipe_speed = SWIPE_SPEED * swipe_scale
+        self.cooldown = float(settings["gesture_timeout"])
+        self.feedback = bool(settings["enable_feedback"])
+
+        bound = {event: action_hotkey(mappings.get(gesture)) for gesture, event in GESTURE_EVENTS.items()}
+        self.tap = bound["tap"]
+        self.double_tap = bound["double_tap"]
+        self.swipe_left = bound["swipe_left"]
+        self.swipe_right = bound["swipe_right"]
+        self.pinch = self.tap is not None or self.double_tap is not None
+        self.swipe = self.swipe_left is not None or self.swipe_right is not None
+
+        # Templates are resampled and normalized again here, so hand-edited ones of any length work
+        self.custom = {}
+        templates = []
+        for name, points in settings.get("custom_gestures", {}).items():
+            keys = action_hotkey(mappings.get(name))
+            if keys is None:
+                continue
+            self.custom[name] = keys
+            templates.extend((name, normalize(resample(p, TEMPLATE_POINTS))) for p in points)
+        self.templates = TemplateSet(templates) if templates else None
+
+        self.mode_patterns = {
+            pattern_mask(pattern): mode
+            for name, (mode, pattern) in MODES.items() if modes.get(name, 1)
+        }
+
+    @classmethod
+    def load(cls, path=CONFIG_PATH):
+        return cls(load_config(path))
+
+
+DEFAULT_BINDINGS = GestureBindings(DEFAULT_CONFIG)
@@ -0,0 +1,215 @@
+import argparse
+import numpy as np
+
+# Templates and live trajectories are resampled to this many points along their path
+TEMPLATE_POINTS = 32
+BAND = 3                    # Sakoe-Chiba band: a point may be matched up to this many points away
+MATCH_DISTANCE = 0.08       # mean point distance in normalized template units to accept a match
+MIN_PATH = 0.25             # fingertip path, in frame widths, before a trajectory is worth matching
+TEMPLATE_WINDOWS = (0.6, 1.0, 1.5)   # trajectory lengths in seconds tried against the templates
+TEMPLATE_INTERVAL = 0.1     # seconds between template checks of one hand
+STILL_SPEED = 0.15          # frame widths per second below which the fingertip counts as resting
+
+
+def resample(points, count=TEMPLATE_POINTS):
+    """`count` points equally spaced along the path through (n, 2) `points`."""
+    points = np.asarray(points, dtype=np.float64)
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    along = np.concatenate(([0.0], np.cumsum(steps)))
+    if along[-1] <= 0:
+        return np.repeat(points[:1], count, axis=0)
+    targets = np.linspace(0.0, along[-1], count)
+    return np.stack([np.interp(targets, along, points[:, 0]), np.interp(targets, along, points[:, 1])], axis=1)
+
+
+def normalize(points):
+    """
+    Centre on the centroid and scale uniformly so the larger side of the
+    bounding box is 1. Uniform scaling keeps straight strokes straight;
+    orientation is kept, so a checkmark and its mirror image differ.
+    """
+    points = points - points.mean(axis=0)
+    extent = float((points.max(axis=0) - points.min(axis=0)).max())
+    if extent > 0:
+        points = points / extent
+    return points
+
+
+def prepare(x, y, aspect=4 / 3, count=TEMPLATE_POINTS):
+    """
+    (count, 2) float32 template from normalized fingertip coordinates;
+    `aspect` (width / height) puts x and y in the same units first.
+    """
+    points = np.stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64) / aspect], axis=1)
+    return normalize(resample(points, count)).astype(np.float32)
+
+
+class TemplateSet:
+    """
+    Gesture templates stacked into one (templates, points, 2) array so a
+    live trajectory is compared with all of them at once.
+
+    `match` is DTW restricted to a band around the diagonal. The
+    diagonal itself (plain point-by-point distance) bounds every
+    template's DTW from above, and LB_Keogh over the precomputed band
+    envelopes bounds it from below, both for all templates in one
+    vectorized pass. Only templates whose lower bound beats the best upper
+    bound get the DTW, run row by row for all of them together, and a
+    template is abandoned as soon as its cheapest cell in a row is worse
+    than that bound.
+    """
+    def __init__(self, templates, band=BAND):
+        # templates: [(name, (points, 2) array), ...], several per name are fine
+        self.names = [name for name, _ in templates]
+        self.templates = np.array([t for _, t in templates], dtype=np.float32).reshape(len(templates), -1, 2)
+        self.band = band
+        count = self.templates.shape[1]
+        # Envelopes: per point, the min / max of each coordinate within the band
+        windows = [self.templates[:, max(i - band, 0):i + band + 1] for i in range(count)]
+        self.lower = np.stack([w.min(axis=1) for w in windows], axis=1) if count else self.templates
+        self.upper = np.stack([w.max(axis=1) for w in windows], axis=1) if count else self.templates
+
+    def __len__(self):
+        return len(self.names)
+
+    def bounds(self, query):
+        # (lower, upper) bounds of every template's DTW cost against a prepared query
+        upper = np.sqrt(((self.templates - query) ** 2).sum(axis=2)).sum(axis=1)
+        outside = np.maximum(query - self.upper, 0) + np.maximum(self.lower - query, 0)
+        lower = np.sqrt((outside ** 2).sum(axis=2)).sum(axis=1)
+        return lower, upper
+
+    def match(self, query, max_distance=MATCH_DISTANCE):
+        """(name, mean point distance) of the best template for a prepared query, or None."""
+        if not len(self.names):
+            return None
+        count = len(query)
+        lower, upper = self.bounds(query)
+        best = int(np.argmin(upper))
+        limit = min(float(upper[best]), max_distance * count)
+        candidates = np.flatnonzero(lower <= limit)
+        if not len(candidates):
+            return None
+        costs = self._dtw(query, candidates, limit)
+        if costs is None:
+            # Nothing beat the diagonal: it is the best path there is
+            if upper[best] > max_distance * count:
+                return None
+            return self.names[best], float(upper[best]) / count
+        index, cost = costs
+        return self.names[index], cost / count
+
+    def _dtw(self, query, candidates, limit):
+        # Banded DTW of `query` against the candidate templates, vectorized over templates.
+        # Returns (template index, cost) of the cheapest one under `limit`, or None.
+        band = self.band
+        count = len(query)
+        # Point-major, so each DTW cell is one contiguous vector across templates
+        templates = self.templates[candidates].transpose(1, 0, 2)
+        # Rows of cells with an infinite cell in front, so "diagonal" is always one to the left
+        previous = np.full((count + 1, len(candidates)), np.inf)
+        previous[0] = 0.0
+        for i in range(count):
+            lo, hi = max(i - band, 0), min(i + band + 1, count)
+            cost = np.sqrt(((templates[lo:hi] - query[i]) ** 2).sum(axis=2))
+            # Best of the cell above and the one diagonally above-left, for the whole row at once
+            reach = np.minimum(previous[lo:hi], previous[lo + 1:hi + 1])
+            row = np.full_like(previous, np.inf)
+            left = row[lo + 1] = cost[0] + reach[0]
+            for j in range(1, hi - lo):
+                left = row[lo + j + 1] = cost[j] + np.minimum(reach[j], left)
+            # Early abandon: a path only gets more expensive from here
+            alive = row[lo + 1:hi + 1].min(axis=0) <= limit
+            if not alive.all():
+                if not alive.any():
+                    return None
+                candidates, templates, row = candidates[alive], templates[:, alive], row[:, alive]
+            previous = row
+        final = previous[-1]
+        best = int(np.argmin(final))
+        if final[best] > limit:
+            return None
+        return int(candidates[best]), float(final[best])
+
+
+def match_trajectory(trajectory, now, templates, aspect=4 / 3, windows=TEMPLATE_WINDOWS,
+                     min_path=MIN_PATH, max_distance=MATCH_DISTANCE):
+    """
+    Name of the template the recent movement in a TrajectoryBuffer
+    matches best, or None. Gestures are drawn at different speeds, so the
+    last few `windows` seconds are each tried, without the resting
+    fingertip before and after the movement; windows with less than
+    `min_path` of fingertip travel are skipped before any matching.
+    """
+    t, x, y = trajectory.window(now, max(windows))
+    if len(t) < 3:
+        return None
+    steps = np.hypot(np.diff(x), np.diff(y) / aspect)
+    moving = np.flatnonzero(steps > STILL_SPEED * np.maximum(np.diff(t), 1e-3))
+    if not len(moving):
+        return None
+    # Samples from the first to the last moving step
+    first, last = int(moving[0]), int(moving[-1]) + 2
+    best = None
+    tried = set()
+    for duration in windows:
+        start = max(int(t.searchsorted(now - duration)), first)
+        if last - start < 3 or start in tried:
+            continue
+        tried.add(start)
+        if steps[start:last - 1].sum() < min_path:
+            continue
+        result = templates.match(prepare(x[start:last], y[start:last], aspect), max_distance)
+        if result is not None and (best is None or result[1] < best[1]):
+            best = result
+    return None if best is None else best[0]
+
+
+def main():
+    # Imported here: gesture_engine compiles TemplateSets from this module
+    from gesture_engine import CONFIG_PATH, load_config, save_config
+    from landmark_trace import TraceReader
+    from landmarks import INDEX_TIP
+
+    parser = argparse.ArgumentParser(description="Manage the custom gesture templates in mappings.json")
+    parser.add_argument("--config", default=CONFIG_PATH, help="mappings file to edit")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add a template recorded in a landmark trace")
+    add.add_argument("name", help="gesture name, used as the key in 'mappings'")
+    add.add_argument("trace", help="trace directory written by --record-landmarks")
+    add.add_argument("--start", type=float, default=0.0, help="seconds into the trace the gesture starts")
+    add.add_argument("--end", type=float, default=None, help="seconds into the trace the gesture ends")
+    add.add_argument("--action", help="action or hotkey to map the gesture to, e.g. ctrl+z")
+    remove = commands.add_parser("remove", help="remove a gesture and all its templates")
+    remove.add_argument("name")
+    commands.add_parser("list", help="list the custom gestures")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    custom = config.setdefault("gesture_settings", {}).setdefault("custom_gestures", {})
+    if args.command == "list":
+        for name, templates in custom.items():
+            print(f"{name}: {len(templates)} template(s) -> {config.get('mappings', {}).get(name, 'unmapped')}")
+        return
+    if args.command == "remove":
+        custom.pop(args.name, None)
+        config.get("mappings", {}).pop(args.name, None)
+    else:
+        reader = TraceReader(args.trace)
+        frames = reader.frames
+        times = frames["timestamp"] - frames["timestamp"][0] if len(frames) else frames["timestamp"]
+        end = args.end if args.end is not None else float("inf")
+        # Index fingertip of the first hand of every frame in the range
+        selected = frames[(times >= args.start) & (times <= end) & (frames["num_hands"] > 0)]
+        if len(selected) < 2:
+            parser.error("the trace has fewer than two frames with a hand in that range")
+        tips = np.asarray(reader.landmarks)[selected["first_hand"], INDEX_TIP, :2]
+        width, height = reader.image_size
+        template = prepare(tips[:, 0], tips[:, 1], width / height)
+        custom.setdefault(args.name, []).append(np.round(template, 4).tolist())
+        if args.action:
+            config.setdefault("mappings", {})[args.name] = args.action
+    save_config(config, args.config)
+
+if __name__ == "__main__":
+    main()
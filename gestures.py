@@ -0,0 +1,405 @@
+import math
+import cv2 as cv
+import numpy as np
+from instrumentation import DispatchTimer
+from landmarks import WRIST, finger_states, hand_features, pattern_mask, to_pixels
+from gesture_engine import DEFAULT_BINDINGS, DOUBLE_TAP_WINDOW, PINCH_THRESHOLD, SWIPE_WINDOW
+from gesture_templates import TEMPLATE_INTERVAL, match_trajectory
+from trajectory import TrajectoryBuffer, detect_swipe
+
+# Constants
+smooth_factor = 3
+SCROLL_INTERVAL = 0.05
+ZOOM_STEP = 0.15            # relative change in hand distance per zoom step
+ZOOM_COOLDOWN = 0.2
+MAX_TRACKS = 4
+HANDEDNESS_PENALTY = 0.25   # in normalized wrist distance
+
+# Open palm leaves any mode; the patterns that enter modes come from GestureBindings
+OPEN_PALM = pattern_mask([1, 1, 1, 1, 1])
+
+
+def detect_fingers(points):
+    # [thumb, index, middle, ring, pinky] as 0/1 for a (21, 3) landmark array
+    return finger_states(points).astype(int).tolist()
+
+def interp(x, x0, x1, y0, y1):
+    # Scalar np.interp over two points (clamped at both ends) without the NumPy call overhead
+    if x <= x0:
+        return y0
+    if x >= x1:
+        return y1
+    return (y1 - y0) / (x1 - x0) * (x - x0) + y0
+
+def calculate_distance(point1, point2):
+    return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+
+def detect_pinch(index_tip, thumb_tip, threshold=PINCH_THRESHOLD):
+    distance = calculate_distance(index_tip, thumb_tip)
+    return distance < threshold
+
+
+class HandState:
+    """Gesture state of one tracked hand."""
+    def __init__(self, track_id):
+        self.track_id = track_id
+        self.mode = 'N'
+        self.active = 0
+        self.trajectory = TrajectoryBuffer()
+        self.last_swipe_time = 0
+        self.last_template_check = 0
+        self.last_custom_time = 0
+        self.last_pinch_time = 0
+        self.pinched = False
+        self.last_tap_onset = None   # onset of a pinch that may still become a double tap
+        self.tap_held = False        # the pinch held now has sent its tap and repeats it
+        self.last_scroll_time = 0
+        self.volBar = 400
+        self.volPer = 0
+
+
+class HandTracker:
+    """
+    Gives every hand a track ID that stays stable across frames, so each
+    hand keeps its own gesture state. Hands are matched to the wrist
+    position each track was last seen at, with a penalty for a change of
+    handedness. Tracks are kept while their hand is out of view and only
+    dropped beyond `max_tracks`; a lone hand with a lone track takes it
+    without any array work.
+    """
+    def __init__(self, max_tracks=MAX_TRACKS):
+        self.max_tracks = max_tracks
+        self.tracks = {}       # track ID -> [wrist x, wrist y, handedness code, last seen]
+        self.next_id = 0
+
+    def assign(self, hands, handedness, now):
+        """Track IDs parallel to `hands`; `handedness` codes may be None (unknown)."""
+        count = len(hands)
+        if count == 1 and len(self.tracks) <= 1:
+            track = next(iter(self.tracks), None)
+            if track is None:
+                track = self._new_track()
+            self._update(track, hands[0], -1 if handedness is None else int(handedness[0]), now)
+            return [track]
+
+        codes = np.full(count, -1) if handedness is None else np.asarray(handedness[:count], dtype=np.int64)
+        ids = list(self.tracks)
+        assigned = [None] * count
+        if ids:
+            known = np.array([self.tracks[t] for t in ids], dtype=np.float64)
+            wrists = hands[:, WRIST, :2]
+            cost = np.hypot(wrists[:, None, 0] - known[None, :, 0], wrists[:, None, 1] - known[None, :, 1])
+            flipped = (codes[:, None] >= 0) & (known[None, :, 2] >= 0) & (codes[:, None] != known[None, :, 2])
+            cost += HANDEDNESS_PENALTY * flipped
+            # Greedy matching is exact enough for the two to four hands MediaPipe returns
+            used = set()
+            for flat in np.argsort(cost, axis=None).tolist():
+                i, j = divmod(flat, len(ids))
+                if assigned[i] is None and j not in used:
+                    assigned[i] = ids[j]
+                    used.add(j)
+        for i in range(count):
+            if assigned[i] is None:
+                assigned[i] = self._new_track()
+            self._update(assigned[i], hands[i], int(codes[i]), now)
+        return assigned
+
+    def _new_track(self):
+        if len(self.tracks) >= self.max_tracks:
+            # Forget the track that has been out of view longest
+            del self.tracks[min(self.tracks, key=lambda t: self.tracks[t][3])]
+        track = self.next_id
+        self.next_id += 1
+        self.tracks[track] = [0.0, 0.0, -1, 0.0]
+        return track
+
+    def _update(self, track, points, code, now):
+        self.tracks[track] = [float(points[WRIST, 0]), float(points[WRIST, 1]), code, now]
+
+
+class GestureController:
+    """
+    Gesture state machine, one HandState per tracked hand: finger-pattern
+    mode switching plus tap, double tap, swipe, cursor, volume and scroll
+    handling, and a two-hand zoom layer (both palms open, spread apart or
+    brought together). Only one hand at a time drives the cursor.
+    `bindings` (gesture_engine.GestureBindings, compiled from
+    mappings.json) decide thresholds, enabled modes and the keys each
+    gesture sends; it can be replaced between frames.
+
+    `actions` provides hotkey/move_to/scroll/set_volume, screen_size and
+    volume_range. Every action goes through `dispatch` so it is timed.
+    With a `cursor_filter` (see cursor.py) cursor mode is smoothed and
+    latency-compensated instead of following the raw fingertip. With a
+    `cursor_emitter` cursor samples go to that thread, which moves the
+    cursor at its own rate, instead of one move per frame.
+    Drawing only happens when a frame is passed in; `draw_landmarks` gets
+    the frame and the hand's (21, 2) pixel coordinates.
+    """
+    def __init__(self, actions, dispatch=None, draw_landmarks=None, cursor_filter=None, cursor_emitter=None,
+                 bindings=None):
+        self.actions = actions
+        self.bindings = bindings if bindings is not None else DEFAULT_BINDINGS
+        self._applied_bindings = self.bindings
+        self.cursor_filter = cursor_filter
+        self.cursor_emitter = cursor_emitter
+        self.dispatch = dispatch if dispatch is not None else DispatchTimer()
+        self.draw_landmarks = draw_landmarks
+        self.screen_width, self.screen_height = actions.screen_size
+        self.min_vol, self.max_vol = actions.volume_range
+
+        self.tracker = HandTracker()
+        self.states = {}
+        self.visible = []          # HandStates of the last frame with hands
+        self.cursor_owner = None   # track ID of the hand driving the cursor
+        self.zoom_base = None      # hand distance the current zoom step is measured from
+        self.last_zoom_time = 0
+
+    @property
+    def mode(self):
+        if not self.visible:
+            return 'N'
+        return '/'.join(state.mode for state in self.visible)
+
+    def process_hands(self, hands, current_time, image_size, frame=None, handedness=None):
+        """
+        Handle all hands of one frame. `hands` is the (hands, 21, 3) landmark
+        array, `current_time` the frame's timestamp, `image_size` the
+        (width, height) the pixel thresholds refer to and `handedness` the
+        optional per-hand codes from landmarks.handedness_codes.
+        """
+        if self.bindings.double_tap is not None:
+            # Held-back taps are due by the clock, also when the hand has left the frame
+            for state in self.states.values():
+                if state.last_tap_onset is not None:
+                    self._flush_tap(state, current_time)
+        if not len(hands):
+            return
+        if self.bindings is not self._applied_bindings:
+            self._apply_bindings(self.bindings)
+        width, height = image_size
+        # Features for every hand in one vectorized pass, then plain scalars per hand
+        masks, tips, index_norm = hand_features(hands, width, height)
+        tracks = self.tracker.assign(hands, handedness, current_time)
+        states = self.states
+        visible = []
+        for track in tracks:
+            state = states.get(track)
+            if state is None:
+                state = states[track] = HandState(track)
+            visible.append(state)
+        if len(states) > len(self.tracker.tracks):
+            for track in [t for t in states if t not in self.tracker.tracks]:
+                del states[track]
+        self.visible = visible
+        if self.cursor_owner is not None and self.cursor_owner not in tracks:
+            self.cursor_owner = None
+
+        two_hands = len(masks) >= 2 and masks[0] == OPEN_PALM and masks[1] == OPEN_PALM
+        if two_hands:
+            self._zoom(tips[0][0], tips[1][0], width, current_time)
+        else:
+            self.zoom_base = None
+        for i, state in enumerate(visible):
+            self._process_hand(state, masks[i], tips[i], index_norm[i], current_time, frame, hands[i], image_size,
+                               two_hands)
+
+        if self.cursor_emitter is not None and self.cursor_owner is None:
+            self.cursor_emitter.release()
+
+    def _apply_bindings(self, bindings):
+        # New config: hands in a mode that is now disabled drop back to neutral
+        self._applied_bindings = bindings
+        enabled = set(bindings.mode_patterns.values())
+        for state in self.states.values():
+            if state.mode != 'N' and state.mode not in enabled:
+                state.mode = 'N'
+                state.active = 0
+                if self.cursor_owner == state.track_id:
+                    self.cursor_owner = None
+
+    def process(self, points, current_time, image_size, frame=None):
+        # Single (21, 3) hand
+        self.process_hands(points[None], current_time, image_size, frame)
+
+    def _zoom(self, first, second, width, current_time):
+        # Index tips of both open hands; distance relative to the frame width
+        distance = math.hypot(first[0] - second[0], first[1] - second[1]) / width
+        if self.zoom_base is None:
+            self.zoom_base = distance
+            return
+        if current_time - self.last_zoom_time < ZOOM_COOLDOWN:
+            return
+        ratio = distance / self.zoom_base if self.zoom_base else 1.0
+        if ratio > 1.0 + ZOOM_STEP:
+            self.dispatch.call(self.actions.hotkey, 'ctrl', '+')
+        elif ratio < 1.0 - ZOOM_STEP:
+            self.dispatch.call(self.actions.hotkey, 'ctrl', '-')
+        else:
+            return
+        self.zoom_base = distance
+        self.last_zoom_time = current_time
+
+    def _tap(self, state, onset_time, frame, index_x, index_y):
+        state.last_pinch_time = onset_time
+        self._tap_feedback(frame, index_x, index_y)
+        self.dispatch.call(self.actions.hotkey, *self.bindings.tap)
+
+    @staticmethod
+    def _tap_feedback(frame, index_x, index_y):
+        if frame is not None:
+            cv.circle(frame, (index_x, index_y), 10, (0, 0, 255), -1)
+            cv.putText(frame, "Pinch Detected", (50, 150), cv.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+
+    def _flush_tap(self, state, current_time, held=False):
+        # Sends the held-back Tap of `state` once its double tap window has passed; True if sent
+        onset = state.last_tap_onset
+        if onset is None or current_time - onset <= DOUBLE_TAP_WINDOW:
+            return False
+        state.last_tap_onset = None
+        # A window that ran out while no results came in (detection off) is too old to act on
+        if (self.bindings.tap is None or current_time - onset > 2 * DOUBLE_TAP_WINDOW
+                or onset - state.last_pinch_time <= self.bindings.cooldown):
+            return False
+        state.tap_held = held
+        self._tap(state, onset, None, 0, 0)
+        return True
+
+    def _tap_or_double_tap(self, state, pinched, current_time, frame, index_x, index_y):
+        # With a double tap bound, a pinch's Tap waits out DOUBLE_TAP_WINDOW: a second pinch
+        # onset in that time sends the double tap instead, never both
+        bindings = self.bindings
+        if self._flush_tap(state, current_time, held=pinched and state.pinched):
+            self._tap_feedback(frame, index_x, index_y)
+        if pinched and not state.pinched:
+            state.tap_held = False
+            onset = state.last_tap_onset
+            if onset is None:
+                state.last_tap_onset = current_time
+            else:
+                state.last_tap_onset = None
+                # Same cooldown as a single tap, counted from the first pinch
+                if onset - state.last_pinch_time > bindings.cooldown:
+                    state.last_pinch_time = current_time
+                    self.dispatch.call(self.actions.hotkey, *bindings.double_tap)
+        elif not pinched:
+            state.tap_held = False
+        elif state.tap_held and current_time - state.last_pinch_time > bindings.cooldown:
+            # Held past the window: repeats like the immediate Tap
+            self._tap(state, current_time, frame, index_x, index_y)
+
+    def _process_hand(self, state, fingers, tips, index_norm, current_time, frame, points, image_size,
+                      two_hands=False):
+        dispatch = self.dispatch
+        bindings = self.bindings
+        feedback = frame is not None and bindings.feedback
+        (index_x, index_y), (thumb_x, thumb_y), (middle_x, middle_y) = tips
+
+        # Single-hand pinch and swipe are off while both hands are zooming
+        if bindings.pinch and not two_hands:
+            pinched = detect_pinch((index_x, index_y), (thumb_x, thumb_y), bindings.pinch_threshold)
+            if bindings.double_tap is None:
+                # Tap: fires on pinch and repeats every cooldown while held
+                if pinched and bindings.tap is not None and current_time - state.last_pinch_time > bindings.cooldown:
+                    self._tap(state, current_time, frame if feedback else None, index_x, index_y)
+            else:
+                self._tap_or_double_tap(state, pinched, current_time, frame if feedback else None, index_x, index_y)
+            state.pinched = pinched
+
+        if bindings.swipe or bindings.templates is not None:
+            if two_hands:
+                # Zoom movement must not count as a swipe afterwards
+                state.trajectory.clear()
+            else:
+                state.trajectory.add(current_time, index_norm[0], index_norm[1])
+                if bindings.swipe and current_time - state.last_swipe_time > bindings.cooldown:
+                    swipe_direction = detect_swipe(state.trajectory, current_time, SWIPE_WINDOW,
+                                                   bindings.swipe_distance, bindings.swipe_speed,
+                                                   image_size[0] / image_size[1])
+                    keys = None
+                    if swipe_direction == "right":
+                        keys = bindings.swipe_right
+                    elif swipe_direction == "left":
+                        keys = bindings.swipe_left
+                    if keys is not None:
+                        state.last_swipe_time = current_time
+                        state.trajectory.clear()
+                        dispatch.call(self.actions.hotkey, *keys)
+                # Custom gestures only outside the modes, where the fingertip moves for other reasons
+                if (bindings.templates is not None and state.mode == 'N'
+                        and current_time - state.last_template_check >= TEMPLATE_INTERVAL
+                        and current_time - state.last_custom_time > bindings.cooldown):
+                    state.last_template_check = current_time
+                    name = match_trajectory(state.trajectory, current_time, bindings.templates,
+                                            image_size[0] / image_size[1])
+                    if name is not None:
+                        state.last_custom_time = current_time
+                        state.trajectory.clear()
+                        dispatch.call(self.actions.hotkey, *bindings.custom[name])
+
+        # Mode detection; disabled modes are not in mode_patterns at all
+        mode_patterns = bindings.mode_patterns
+        if fingers == OPEN_PALM:
+            state.mode = 'N'
+            state.active = 0
+            if frame is not None and self.draw_landmarks is not None:
+                self.draw_landmarks(frame, to_pixels(points, *image_size))
+        elif fingers in mode_patterns and state.active == 0:
+            state.mode = mode_patterns[fingers]
+            state.active = 1
+
+        # The first hand in cursor mode owns the cursor until it leaves the mode or the frame
+        if state.mode == 'Cursor':
+            if self.cursor_owner is None:
+                self.cursor_owner = state.track_id
+                if self.cursor_filter is not None:
+                    self.cursor_filter.reset()
+        elif self.cursor_owner == state.track_id:
+            self.cursor_owner = None
+        cursor = self.cursor_owner == state.track_id
+
+        # Mode handling
+        if cursor and self.cursor_emitter is not None:
+            tip_x, tip_y = index_norm
+            velocity = None
+            if self.cursor_filter is not None:
+                # The emitter does its own per-tick prediction from the filtered state
+                self.cursor_filter.update(tip_x, tip_y, current_time)
+                tip_x, tip_y = self.cursor_filter.position()
+                velocity = self.cursor_filter.velocity()
+            self.cursor_emitter.push(tip_x, tip_y, current_time, velocity)
+
+        elif cursor:
+            tip_x, tip_y = index_norm
+            if self.cursor_filter is not None:
+                tip_x, tip_y = self.cursor_filter.update(tip_x, tip_y, current_time)
+            # Clamped like the emitter's target: the raw fingertip can be outside the image
+            tip_x, tip_y = min(max(tip_x, 0.0), 1.0), min(max(tip_y, 0.0), 1.0)
+            target_x = int(tip_x * self.screen_width)
+            target_y = int(tip_y * self.screen_height)
+            dispatch.call(self.actions.move_to, target_x, target_y)
+
+        elif state.mode == 'Volume':
+            length = math.hypot(index_x - thumb_x, index_y - thumb_y)
+            vol = interp(length, 20, 150, self.min_vol, self.max_vol)
+            state.volBar = interp(length, 50, 200, 400, 150)
+            state.volPer = interp(length, 50, 200, 0, 100)
+            dispatch.call(self.actions.set_volume, vol)
+            if feedback:
+                cv.circle(frame, (thumb_x, thumb_y), 10, (0, 255, 0), cv.FILLED)
+                cv.circle(frame, (index_x, index_y), 10, (0, 255, 0), cv.FILLED)
+                cv.line(frame, (thumb_x, thumb_y), (index_x, index_y), (0, 255, 0), 3)
+                cv.rectangle(frame, (50, 150), (85, 400), (0, 255, 0), 3)
+                cv.rectangle(frame, (50, int(state.volBar)), (85, 400), (0, 255, 0), cv.FILLED)
+                cv.putText(frame, f'{int(state.volPer)}%', (40, 450), cv.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+        elif state.mode == 'Scroll' and current_time - state.last_scroll_time > SCROLL_INTERVAL:
+            scroll_distance = middle_y - index_y
+            scroll_speed = int(scroll_distance / smooth_factor)
+            dispatch.call(self.actions.scroll, scroll_speed)
+            state.last_scroll_time = current_time
+
+            if feedback:
+                cv.circle(frame, (index_x, index_y), 10, (255, 0, 0), cv.FILLED)
+                cv.circle(frame, (middle_x, middle_y), 10, (255, 0, 0), cv.FILLED)
+                cv.line(frame, (index_x, index_y), (middle_x, middle_y), (255, 0, 0), 3)
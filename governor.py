@@ -0,0 +1,100 @@
+import threading
+
+# Quality tiers from best to cheapest. Landmarks are normalized, so gesture thresholds keep
+# working at lower resolutions (the render loop scales frames back to the nominal size).
+TIERS = [
+    {"name": "full", "model_complexity": 1, "resolution": (640, 480), "frame_skip": 0},
+    {"name": "lite", "model_complexity": 0, "resolution": (640, 480), "frame_skip": 0},
+    {"name": "low-res", "model_complexity": 0, "resolution": (320, 240), "frame_skip": 0},
+    {"name": "skip", "model_complexity": 0, "resolution": (320, 240), "frame_skip": 1},
+]
+
+HIGH_WATER = 0.9        # processing time above this share of the frame interval means falling behind
+LOW_WATER = 0.5         # below this there is headroom to restore quality
+DEGRADE_HOLD = 1.0      # seconds continuously behind before shedding load
+UPGRADE_HOLD = 4.0      # seconds continuously with headroom before restoring quality
+MAX_UPGRADE_HOLD = 60.0
+SMOOTHING = 0.1         # EWMA weight of each new timing sample
+
+
+class QualityGovernor:
+    """
+    Closed-loop load shedding for the inference path. The processing
+    thread reports how long each frame took against the capture interval.
+    The governor moves one tier down after DEGRADE_HOLD seconds above
+    HIGH_WATER and one tier up after the upgrade hold below LOW_WATER.
+    The gap between the two marks, the hold times and a hold that doubles
+    whenever an upgrade has to be undone keep it from oscillating.
+    """
+    def __init__(self, tiers=TIERS, start_tier=0):
+        self.tiers = tiers
+        self.tier = start_tier
+        self._lock = threading.Lock()
+        self.processing_time = None
+        self.frame_interval = None
+        self._last_capture = None
+        self._state_since = None
+        self._state = None
+        self._upgrade_hold = UPGRADE_HOLD
+        self._last_change = None
+        self._last_change_was_upgrade = False
+        self.changes = 0
+
+    @property
+    def current(self):
+        return self.tiers[self.tier]
+
+    def observe_capture(self, capture_time):
+        # Called for every captured frame, processed or not, to learn the real frame interval
+        with self._lock:
+            if self._last_capture is not None:
+                interval = capture_time - self._last_capture
+                if interval > 0:
+                    self.frame_interval = self._ewma(self.frame_interval, interval)
+            self._last_capture = capture_time
+
+    def observe(self, processing_time, now):
+        """Called after each processed frame with its convert + inference time."""
+        with self._lock:
+            self.processing_time = self._ewma(self.processing_time, processing_time)
+            if not self.frame_interval:
+                return
+            # Skipped frames give the processing thread more time per processed frame
+            budget = self.frame_interval * (self.current["frame_skip"] + 1)
+            load = self.processing_time / budget
+            if load > HIGH_WATER and self.tier < len(self.tiers) - 1:
+                state = "behind"
+            elif load < LOW_WATER and self.tier > 0:
+                state = "headroom"
+            else:
+                state = None
+
+            if state != self._state:
+                self._state, self._state_since = state, now
+                return
+            if state == "behind" and now - self._state_since >= DEGRADE_HOLD:
+                if self._last_change_was_upgrade and now - self._last_change < self._upgrade_hold:
+                    # The last upgrade did not hold; wait longer before trying again
+                    self._upgrade_hold = min(self._upgrade_hold * 2, MAX_UPGRADE_HOLD)
+                self._change(self.tier + 1, now, upgrade=False)
+            elif state == "headroom" and now - self._state_since >= self._upgrade_hold:
+                self._change(self.tier - 1, now, upgrade=True)
+
+    def _change(self, tier, now, upgrade):
+        self.tier = tier
+        self.changes += 1
+        self._last_change = now
+        self._last_change_was_upgrade = upgrade
+        self._state, self._state_since = None, now
+        # Timings from the old tier say nothing about the new one
+        self.processing_time = None
+
+    @staticmethod
+    def _ewma(previous, sample):
+        return sample if previous is None else previous + SMOOTHING * (sample - previous)
+
+    def overlay_text(self):
+        load = ""
+        if self.processing_time and self.frame_interval:
+            load = f" ({self.processing_time / self.frame_interval * 100:.0f}% load)"
+        return f"Tier: {self.current['name']}{load}"
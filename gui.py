@@ -3,6 +3,7 @@ import customtkinter as ctk
 import keyboard
 import threading
 import time
+from gesture_engine import load_config, save_config
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
@@ -44,43 +45,51 @@ BUTTON_STYLE = {
     
 }
 json_filename = "mappings.json"
-
-# Load or initialize configuration
-try:
-    with open(json_filename, "r") as file:
-        data = json.load(file)
-        action_options = data.get("actions", ["Open Menu", "Close Menu", "Next", "Previous"])
-        selected_mappings = data.get("mappings", {})
-        modes = data.get("modes", {})
-        gesture_settings = data.get("gesture_settings", {
-
-        })
-        current_hotkey = data.get("hotkey", "ctrl+shift+g")
-except FileNotFoundError:
-    action_options = ["Open Menu", "Close Menu", "Next", "Previous"]
-    selected_mappings = {}
-    modes = {
-        "Volume Control": True,
-        "Scroll Page": True,
-        "Cursor Mode": True
-    }
-    current_hotkey = "ctrl+shift+g"
-    data = {"actions": action_options, "mappings": selected_mappings, 
-            "modes": modes, "hotkey": current_hotkey}
+# The gesture_settings this window edits; custom_gestures belong to gesture_templates.py
+GUI_SETTINGS = ("swipe_sensitivity", "pinch_threshold", "gesture_timeout", "enable_feedback")
 
 gesture_options = ["Swipe Left", "Swipe Right", "Tap", "Double Tap"]
 
-# Initialize missing mappings
-for gesture in gesture_options:
-    if gesture not in selected_mappings:
-        selected_mappings[gesture] = action_options[0]
+
+def load_ui_config(path):
+    # Load or initialize configuration from the mappings.json the recognizer uses
+    global json_filename, data, action_options, selected_mappings, modes, gesture_settings, current_hotkey
+    json_filename = path
+    try:
+        with open(json_filename, "r") as file:
+            data = json.load(file)
+            action_options = data.get("actions", ["Open Menu", "Close Menu", "Next", "Previous"])
+            selected_mappings = data.get("mappings", {})
+            modes = data.get("modes", {})
+            gesture_settings = data.get("gesture_settings", {
+
+            })
+            current_hotkey = data.get("hotkey", "ctrl+shift+g")
+    except FileNotFoundError:
+        action_options = ["Open Menu", "Close Menu", "Next", "Previous"]
+        selected_mappings = {}
+        modes = {
+            "Volume Control": True,
+            "Scroll Page": True,
+            "Cursor Mode": True
+        }
+        current_hotkey = "ctrl+shift+g"
+        gesture_settings = {}
+        data = {"actions": action_options, "mappings": selected_mappings, 
+                "modes": modes, "hotkey": current_hotkey}
+
+    # Initialize missing mappings
+    for gesture in gesture_options:
+        if gesture not in selected_mappings:
+            selected_mappings[gesture] = action_options[0]
 
 hotkey_id = None
 recording = False  # New flag to track recording state
 
-def run_ui():
+def run_ui(config_path=json_filename):
     
     global root, action_menus, current_page, hotkey_label, record_button
+    load_ui_config(config_path)
 
     root = ctk.CTk()
     root.geometry("1000x600")
@@ -305,9 +314,7 @@ def save_gesture_settings():
     gesture_settings["pinch_threshold"] = tap_duration_slider.get()
     gesture_settings["gesture_timeout"] = gesture_timeout_slider.get()
     gesture_settings["enable_feedback"] = feedback_switch.get()
-    data["gesture_settings"] = gesture_settings
-    with open(json_filename, "w") as outfile:
-        json.dump(data, outfile, indent=4)
+    write_config(settings=gesture_settings)
     show_popup("Gesture settings saved successfully!", "Success")
 def start_recording():
     global recording, hotkey_id
@@ -336,14 +343,32 @@ def update_hotkey_config(new_hotkey):
     root.after(0, lambda: hotkey_label.configure(text=new_hotkey))
 
 def on_submit():
-    data["mappings"] = {gesture: menu.get() for gesture, menu in action_menus.items()}
-    data["modes"] = {mode: switch.get() for mode, switch in mode_switches.items()}
-    data["hotkey"] = current_hotkey
-    data["gesture_settings"] = gesture_settings
-    with open(json_filename, "w") as outfile:
-        json.dump(data, outfile, indent=4)
+    write_config(mappings={gesture: menu.get() for gesture, menu in action_menus.items()},
+                 modes={mode: switch.get() for mode, switch in mode_switches.items()},
+                 hotkey=current_hotkey, settings=gesture_settings)
     show_popup("Settings saved successfully!", "Success")
 
+def write_config(mappings=None, modes=None, hotkey=None, settings=None):
+    # Only the keys this window owns are replaced, in the file as it is now: custom gestures
+    # and their mappings may have been added by gesture_templates.py since the GUI started.
+    # Saved atomically, so the running recognizer never reads a half-written JSON
+    global data
+    try:
+        config = load_config(json_filename)
+    except (FileNotFoundError, ValueError):
+        config = dict(data)
+    if mappings is not None:
+        config["mappings"] = {**config.get("mappings", {}), **mappings}
+    if modes is not None:
+        config["modes"] = modes
+    if hotkey is not None:
+        config["hotkey"] = hotkey
+    if settings is not None:
+        config["gesture_settings"] = {**config.get("gesture_settings", {}),
+                                      **{key: settings[key] for key in GUI_SETTINGS if key in settings}}
+    save_config(config, json_filename)
+    data = config
+
 def toggle_ui():
     if not recording and root.winfo_viewable():
         root.withdraw()
@@ -0,0 +1,219 @@
+import time
+import cv2 as cv
+import numpy as np
+from instrumentation import InferenceTiming
+from landmarks import HANDEDNESS, NUM_LANDMARKS, results_to_array, handedness_codes
+
+DETECTOR_BACKENDS = ("mediapipe", "synthetic")
+BATCHED_DETECTORS = ("synthetic",)   # backends whose detect_batch is one call, not a loop over frames
+DEFAULT_DETECTOR = "mediapipe"
+
+# Finger patterns the mode state machine reacts to, plus a neutral fist
+PATTERNS = [[1, 1, 1, 1, 1], [1, 1, 0, 0, 0], [0, 1, 1, 0, 0], [0, 1, 0, 0, 0], [0, 0, 0, 0, 0]]
+FINGER_COLUMNS = [0.40, 0.47, 0.54, 0.61]   # x of index, middle, ring, pinky
+
+# Inference cost the synthetic backend stands in for, per frame by model complexity
+SYNTHETIC_LATENCY = {0: 0.006, 1: 0.012}
+SYNTHETIC_OVERHEAD = 0.002   # per detect call, paid once per batch
+SYNTHETIC_HOLD = 20          # frames each finger pattern is held
+
+
+def synthetic_hand(pattern, rng, jitter=0.01):
+    """
+    A (21, 3) normalized landmark array laid out like MediaPipe's hand model
+    with the given [thumb, index, middle, ring, pinky] extension pattern.
+    """
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[0] = (0.5, 0.85, 0.0)
+    # Thumb 1-4: extended means the tip ends up left of landmark 2
+    thumb_tip_x = 0.25 if pattern[0] else 0.50
+    points[1:5, 0] = np.linspace(0.45, thumb_tip_x, 4)
+    points[1:5, 1] = np.linspace(0.78, 0.65, 4)
+    for finger, x in enumerate(FINGER_COLUMNS):
+        base = 5 + 4 * finger
+        points[base:base + 4, 0] = x
+        if pattern[finger + 1]:
+            points[base:base + 4, 1] = np.linspace(0.60, 0.25, 4)
+        else:
+            points[base:base + 4, 1] = (0.60, 0.50, 0.58, 0.65)
+    points[:, :2] += rng.normal(0.0, jitter, (21, 2))
+    return points
+
+
+def detect_each(detector, frames):
+    # detect_batch for detectors that take one frame at a time
+    results = []
+    for _, bgr, now, rgb in frames:
+        hands, handedness, scores = detector.detect(bgr, now, rgb)
+        results.append((hands, handedness, scores, detector.converted_at))
+    return results
+
+
+class HandDetector:
+    """
+    MediaPipe Hands wrapped to take a BGR frame and return landmark
+    arrays: (hands, 21, 3) normalized landmarks, handedness codes and
+    scores. With a RoiTracker (roi.py) it runs on a crop around the
+    tracked hand and only falls back to the full frame to find it.
+    `converted_at` is the time the input was ready for inference.
+
+    Used directly by HandProcessingThread, or inside the worker process
+    of inference_worker.py.
+
+    Detector interface, shared with SyntheticDetector and
+    InferenceProcess: `detect_batch` takes [(stream, bgr, capture
+    time, rgb buffer or None), ...] and returns (hands, handedness,
+    scores, converted_at) per frame; `stats` reports the detector's own
+    timing; `set_model_complexity` and `close`. A HandDetector tracks a
+    single stream, so a batch is one stream's frames in order.
+    """
+    def __init__(self, model_complexity=1, roi=None, max_num_hands=1):
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.roi = roi
+        self.rgb = None
+        self.converted_at = 0.0
+        self.timing = InferenceTiming()
+        self.hands = self.create_hands()
+        # Crops get their own graph so its internal tracking only ever sees the ROI stream
+        self.roi_hands = self.create_hands() if roi is not None else None
+
+    def create_hands(self):
+        # Imported on first use: MediaPipe is the slowest import of the whole pipeline
+        import mediapipe as mp
+        return mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=self.max_num_hands,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.7,
+            model_complexity=self.model_complexity
+        )
+
+    def set_model_complexity(self, model_complexity):
+        # Rebuilding the graph takes a moment; frames arriving meanwhile are simply superseded
+        if model_complexity == self.model_complexity:
+            return
+        self.close()
+        self.model_complexity = model_complexity
+        self.hands = self.create_hands()
+        if self.roi is not None:
+            self.roi_hands = self.create_hands()
+
+    def detect(self, bgr, now, rgb=None):
+        """
+        Landmarks for `bgr` captured at `now`. `rgb` is an optional
+        preallocated buffer of the same shape for the full-frame conversion.
+        """
+        start = time.monotonic()
+        result = self._detect(bgr, now, rgb)
+        self.timing.record(start, time.monotonic())
+        return result
+
+    def detect_batch(self, frames):
+        return detect_each(self, frames)
+
+    def stats(self):
+        return dict(self.timing.stats(), backend="mediapipe", model_complexity=self.model_complexity)
+
+    def _detect(self, bgr, now, rgb):
+        roi = self.roi
+        region = roi.region(bgr.shape, now) if roi is not None else None
+        if region is not None:
+            crop = roi.crop(bgr, region)
+            self.converted_at = time.monotonic()
+            results = self.roi_hands.process(crop)
+            # Landmarks leave here as arrays; protobuf results are not read anywhere else
+            hands = results_to_array(results)
+            if len(hands):
+                roi.to_frame(hands, region, bgr.shape)
+                roi.update(hands, bgr.shape, now)
+                return (hands,) + handedness_codes(results, len(hands))
+            # Tracking lost: look at the whole frame before giving up on this one
+            roi.update(hands, bgr.shape, now)
+
+        if rgb is None:
+            if self.rgb is None or self.rgb.shape != bgr.shape:
+                self.rgb = np.empty_like(bgr)
+            rgb = self.rgb
+        cv.cvtColor(bgr, cv.COLOR_BGR2RGB, dst=rgb)
+        self.converted_at = time.monotonic()
+        results = self.hands.process(rgb)
+        hands = results_to_array(results)
+        if roi is not None:
+            roi.update(hands, bgr.shape, now)
+        return (hands,) + handedness_codes(results, len(hands))
+
+    def close(self):
+        self.hands.close()
+        if self.roi_hands is not None:
+            self.roi_hands.close()
+
+
+class SyntheticDetector:
+    """
+    Deterministic stand-in for the MediaPipe backend, for load tests.
+    The pixels are ignored: the n-th frame of each stream gets the n-th
+    result of a scripted session (every finger pattern held for `hold`
+    frames while drifting sideways, then `hold` frames without a hand),
+    after sleeping for `overhead` per call plus `latency` per frame
+    (default: SYNTHETIC_LATENCY for the model complexity). The sleep
+    releases the GIL like MediaPipe's graph does, and a batch pays the
+    overhead once. One instance can serve any number of streams.
+    """
+    def __init__(self, latency=None, overhead=SYNTHETIC_OVERHEAD, model_complexity=1, max_num_hands=1,
+                 hold=SYNTHETIC_HOLD, drift=0.02, seed=0):
+        self.latency = latency
+        self.overhead = overhead
+        self.model_complexity = model_complexity
+        self.max_num_hands = max_num_hands
+        self.hold = hold
+        self.drift = drift
+        self.seed = seed
+        self.converted_at = 0.0
+        self.timing = InferenceTiming()
+        self._streams = {}   # stream -> [frames seen, random generator]
+        self._no_hands = (np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), np.zeros(0, dtype=np.int8),
+                          np.zeros(0, dtype=np.float32))
+
+    def set_model_complexity(self, model_complexity):
+        self.model_complexity = model_complexity
+
+    def _result(self, stream):
+        state = self._streams.get(stream)
+        if state is None:
+            state = self._streams[stream] = [0, np.random.default_rng((self.seed, stream))]
+        index = state[0]
+        state[0] += 1
+        slot = (index // self.hold) % (len(PATTERNS) + 1)
+        if slot == len(PATTERNS):
+            return self._no_hands
+        hand = synthetic_hand(PATTERNS[slot], state[1])
+        hand[:, 0] += self.drift * np.sin(index / 3.0)
+        if self.max_num_hands < 2:
+            return hand[None], np.array([HANDEDNESS["Right"]], dtype=np.int8), np.full(1, 0.95, dtype=np.float32)
+        # The mirror image as a left hand on the other side of the frame
+        left = hand.copy()
+        left[:, 0] = 1.0 - left[:, 0]
+        return (np.stack([hand, left]), np.array([HANDEDNESS["Right"], HANDEDNESS["Left"]], dtype=np.int8),
+                np.full(2, 0.95, dtype=np.float32))
+
+    def detect_batch(self, frames):
+        start = time.monotonic()
+        results = [self._result(frame[0]) + (start,) for frame in frames]
+        latency = self.latency if self.latency is not None else SYNTHETIC_LATENCY.get(self.model_complexity, 0.012)
+        cost = self.overhead + latency * len(frames)
+        if cost > 0:
+            time.sleep(cost)
+        self.timing.record(start, time.monotonic(), len(frames))
+        return results
+
+    def detect(self, bgr, now, rgb=None):
+        hands, handedness, scores, self.converted_at = self.detect_batch([(0, bgr, now, rgb)])[0]
+        return hands, handedness, scores
+
+    def stats(self):
+        return dict(self.timing.stats(), backend="synthetic", model_complexity=self.model_complexity)
+
+    def close(self):
+        pass
+
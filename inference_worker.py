@@ -0,0 +1,155 @@
+import multiprocessing as mp
+import signal
+import struct
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from hand_detector import detect_each
+from instrumentation import InferenceTiming
+from landmarks import NUM_LANDMARKS
+
+MAX_FRAME_SHAPE = (1080, 1920, 3)   # largest frame the shared block can carry
+MAX_HANDS = 4
+START_TIMEOUT = 30.0                # loading the MediaPipe graph can take a while on first use
+
+# Control messages are fixed-size structs over a pipe; frames and landmarks never go through it
+REQUEST = struct.Struct("<Biidi")     # command, height, width, capture time, model complexity
+RESPONSE = struct.Struct("<idd")      # hand count, converted at, inferred at
+CMD_FRAME = 0
+CMD_STOP = 1
+
+
+class SharedBlock:
+    """
+    One shared-memory segment holding a frame slot and the landmark
+    result area, viewed as NumPy arrays on both sides.
+    """
+    def __init__(self, name=None, max_shape=MAX_FRAME_SHAPE, max_hands=MAX_HANDS):
+        frame_bytes = int(np.prod(max_shape))
+        landmark_bytes = max_hands * NUM_LANDMARKS * 3 * 4
+        size = frame_bytes + landmark_bytes + max_hands * 4 + max_hands
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        buf = self.shm.buf
+        self.frame = np.ndarray(frame_bytes, dtype=np.uint8, buffer=buf)
+        offset = frame_bytes
+        self.landmarks = np.ndarray((max_hands, NUM_LANDMARKS, 3), dtype=np.float32, buffer=buf, offset=offset)
+        offset += landmark_bytes
+        self.scores = np.ndarray(max_hands, dtype=np.float32, buffer=buf, offset=offset)
+        offset += max_hands * 4
+        self.handedness = np.ndarray(max_hands, dtype=np.int8, buffer=buf, offset=offset)
+        self.max_hands = max_hands
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def frame_view(self, shape):
+        return self.frame[:int(np.prod(shape))].reshape(shape)
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        del self.frame, self.landmarks, self.scores, self.handedness
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def worker_main(shm_name, conn, model_complexity, roi_tracking, max_hands):
+    # Runs in the child process: MediaPipe and the ROI tracker live entirely here.
+    # Ctrl+C and SIGTERM reach the whole process group; the parent stops us with CMD_STOP
+    # once its loops are done, so the worker must not die first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from hand_detector import HandDetector
+    from roi import RoiTracker
+    block = SharedBlock(shm_name, max_hands=max_hands)
+    detector = HandDetector(model_complexity, roi=RoiTracker(max_hands=max_hands) if roi_tracking else None,
+                            max_num_hands=max_hands)
+    conn.send_bytes(RESPONSE.pack(0, 0.0, 0.0))
+    try:
+        while True:
+            command, height, width, capture_time, complexity = REQUEST.unpack(conn.recv_bytes())
+            if command == CMD_STOP:
+                break
+            detector.set_model_complexity(complexity)
+            hands, handedness, scores = detector.detect(block.frame_view((height, width, 3)), capture_time)
+            count = min(len(hands), block.max_hands)
+            block.landmarks[:count] = hands[:count]
+            block.handedness[:count] = handedness[:count]
+            block.scores[:count] = scores[:count]
+            conn.send_bytes(RESPONSE.pack(count, detector.converted_at, time.monotonic()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        detector.close()
+        block.close()
+
+
+class InferenceProcess:
+    """
+    Runs HandDetector in a separate process so inference and the UI /
+    gesture threads no longer compete for one GIL.
+
+    `detect` copies the frame into shared memory, sends a small struct
+    over a pipe and waits for the reply; the landmarks come back through
+    the same shared block. Nothing is pickled. One frame is in flight at
+    a time, so this is a drop-in for HandDetector.detect; its timing
+    covers the whole round trip, shared memory copy included.
+    """
+    def __init__(self, model_complexity=1, roi_tracking=True, max_hands=1):
+        self.model_complexity = model_complexity
+        self.converted_at = 0.0
+        self.timing = InferenceTiming()
+        self.block = SharedBlock(max_hands=max(max_hands, 1))
+        # spawn everywhere: fork would copy the camera, Tk and hotkey state into the child
+        context = mp.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, daemon=True,
+                                       args=(self.block.name, child_conn, model_complexity,
+                                             roi_tracking, max_hands))
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(START_TIMEOUT):
+            self.close()
+            raise RuntimeError("Inference worker did not start")
+        self.conn.recv_bytes()
+
+    def set_model_complexity(self, model_complexity):
+        # Applied by the worker with the next frame
+        self.model_complexity = model_complexity
+
+    def detect(self, bgr, now, rgb=None):
+        start = time.monotonic()
+        shape = bgr.shape
+        if bgr.size > self.block.frame.size:
+            raise ValueError(f"Frame {shape} does not fit the shared frame slot")
+        np.copyto(self.block.frame_view(shape), bgr)
+        try:
+            self.conn.send_bytes(REQUEST.pack(CMD_FRAME, shape[0], shape[1], now, self.model_complexity))
+            count, self.converted_at, inferred_at = RESPONSE.unpack(self.conn.recv_bytes())
+        except (EOFError, OSError):
+            raise RuntimeError("Inference worker exited") from None
+        # Copy out, the shared result area is overwritten by the next frame
+        result = (self.block.landmarks[:count].copy(), self.block.handedness[:count].copy(),
+                  self.block.scores[:count].copy())
+        self.timing.record(start, time.monotonic())
+        return result
+
+    def detect_batch(self, frames):
+        return detect_each(self, frames)
+
+    def stats(self):
+        return dict(self.timing.stats(), backend="mediapipe-process", model_complexity=self.model_complexity)
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send_bytes(REQUEST.pack(CMD_STOP, 0, 0, 0.0, 0))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+        self.block.close()
@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# Indices into the per-frame timestamp array carried by each FrameBuffer
+T_READ_START = 0   # capture thread calls cap.read()
+T_CAPTURED = 1     # cap.read() returned
+T_FLIPPED = 2      # mirrored into the pooled buffer
+T_DEQUEUED = 3     # processing thread picked the frame up
+T_CONVERTED = 4    # BGR -> RGB done
+T_INFERRED = 5     # Hands.process returned
+T_FRAME = 6        # the frame was captured (driver timestamp where the source has one)
+NUM_STAMPS = 7
+
+# Stage name -> (start stamp, end stamp) for the stages measured off the frame's own stamps
+FRAME_STAGES = {
+    "age": (T_FRAME, T_CAPTURED),
+    "read": (T_READ_START, T_CAPTURED),
+    "flip": (T_CAPTURED, T_FLIPPED),
+    "queue": (T_FLIPPED, T_DEQUEUED),
+    "convert": (T_DEQUEUED, T_CONVERTED),
+    "inference": (T_CONVERTED, T_INFERRED),
+}
+# "dispatch" is time the gesture loop spends handing actions off; "os_queue" and "os_call"
+# are measured on the ActionDispatcher thread that actually performs them
+# "wake" is the time from the frame that ended idle mode to the first detected hand
+STAGES = tuple(FRAME_STAGES) + ("handoff", "gesture", "dispatch", "total", "os_queue", "os_call", "wake")
+
+DEFAULT_WINDOW = 600
+SUMMARY_INTERVAL = 0.5
+
+
+def new_stamps():
+    return np.zeros(NUM_STAMPS, dtype=np.float64)
+
+
+class RollingHistogram:
+    """
+    Keeps the last `window` samples (in ms) in a fixed array so percentiles
+    reflect recent behaviour and recording never allocates.
+    """
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total_count = 0
+        self._pos = 0
+
+    def add(self, ms):
+        self.samples[self._pos] = ms
+        self._pos = (self._pos + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.total_count += 1
+
+    def percentiles(self, qs=(50, 95, 99)):
+        if self.count == 0:
+            return tuple(0.0 for _ in qs)
+        return tuple(float(v) for v in np.percentile(self.samples[:self.count], qs))
+
+    def buckets(self, edges):
+        counts, _ = np.histogram(self.samples[:self.count], bins=edges)
+        return counts.tolist()
+
+
+class PipelineMetrics:
+    """
+    Rolling p50/p95/p99 per pipeline stage plus total camera-to-OS-action
+    latency. Stage times come from the monotonic stamps each frame carries.
+    """
+    BUCKET_EDGES_MS = [0, 1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 60000]
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._lock = threading.Lock()
+        self.stats = {stage: RollingHistogram(window) for stage in STAGES}
+        self._summary = {}
+        self._summary_time = 0.0
+        self.frames = 0
+        self._first_frame = None
+        self._last_frame = None
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.stats[stage].add(seconds * 1000.0)
+
+    def record_frame(self, stamps, picked_up, gesture_time, dispatch_time=0.0, action_time=None, total=True):
+        """
+        Record one fully handled frame. `picked_up` is when the UI loop received
+        the result; `action_time` is when its last action was handed off, if any.
+        With OS actions on, the ActionDispatcher records "total" when the OS
+        call returns (`total` False); without them "total" ends at
+        `action_time`, the dispatch decision.
+        """
+        with self._lock:
+            self.frames += 1
+            if self._first_frame is None:
+                self._first_frame = picked_up
+            self._last_frame = picked_up
+            for stage, (start, end) in FRAME_STAGES.items():
+                if stamps[start] and stamps[end]:
+                    self.stats[stage].add((stamps[end] - stamps[start]) * 1000.0)
+            if stamps[T_INFERRED]:
+                self.stats["handoff"].add((picked_up - stamps[T_INFERRED]) * 1000.0)
+            self.stats["gesture"].add(gesture_time * 1000.0)
+            if action_time is not None:
+                self.stats["dispatch"].add(dispatch_time * 1000.0)
+                if total:
+                    self.stats["total"].add((action_time - stamps[T_CAPTURED]) * 1000.0)
+
+    def summary(self, max_age=SUMMARY_INTERVAL):
+        # Percentiles are recomputed at most every `max_age` seconds
+        now = time.monotonic()
+        with self._lock:
+            if now - self._summary_time >= max_age:
+                self._summary = {
+                    stage: dict(zip(("p50", "p95", "p99"), hist.percentiles()), count=hist.total_count)
+                    for stage, hist in self.stats.items()
+                }
+                self._summary_time = now
+            return self._summary
+
+    def fps(self):
+        # Average rate of handled frames since the first one
+        with self._lock:
+            if self.frames < 2 or self._last_frame <= self._first_frame:
+                return 0.0
+            return (self.frames - 1) / (self._last_frame - self._first_frame)
+
+    def overlay_lines(self):
+        lines = []
+        for stage, s in self.summary().items():
+            if s["count"]:
+                lines.append(f"{stage:>9}: {s['p50']:5.1f} {s['p95']:5.1f} {s['p99']:5.1f} ms")
+        return lines
+
+    def dump(self, path, **sections):
+        # `sections` are extra report entries, e.g. the capture source's stats
+        summary = self.summary(max_age=0)
+        fps = self.fps()
+        with self._lock:
+            report = {
+                "frames": self.frames,
+                "fps": fps,
+                "window": len(self.stats["total"].samples),
+                "bucket_edges_ms": self.BUCKET_EDGES_MS,
+                "stages": {
+                    stage: dict(summary[stage], buckets=hist.buckets(self.BUCKET_EDGES_MS))
+                    for stage, hist in self.stats.items()
+                },
+            }
+        report.update(sections)
+        with open(path, "w") as outfile:
+            json.dump(report, outfile, indent=4)
+
+
+def process_start_time():
+    # Monotonic time this process was started (from /proc on Linux), else the current time
+    try:
+        with open("/proc/self/stat") as file:
+            starttime = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return time.monotonic() - max(uptime - starttime / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic()
+
+
+class StartupTimer:
+    """
+    Seconds from process start to each startup milestone (camera open,
+    detector ready, first frame, ..., first recognized gesture). Only the
+    first time a milestone is reached counts, so marking it on every
+    frame is a cheap dict lookup.
+    """
+    def __init__(self, origin=None):
+        self.origin = process_start_time() if origin is None else origin
+        self.marks = {}
+
+    def mark(self, name, now=None):
+        # True the first time `name` is reached
+        if name in self.marks:
+            return False
+        self.marks[name] = (time.monotonic() if now is None else now) - self.origin
+        return True
+
+    def summary(self):
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.marks.items())
+
+
+class DispatchTimer:
+    """
+    Wraps OS action calls made while handling one frame, accumulating the
+    time spent in them and remembering when the last one returned.
+    When disabled the actions are skipped but still timestamped, so replay
+    runs measure latency up to the dispatch decision.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.elapsed = 0.0
+        self.last_end = None
+
+    def reset(self):
+        self.elapsed = 0.0
+        self.last_end = None
+
+    def call(self, action, *args):
+        start = time.monotonic()
+        result = action(*args) if self.enabled else None
+        self.last_end = time.monotonic()
+        self.elapsed += self.last_end - start
+        return result
+
+
+class InferenceTiming:
+    """
+    A detector's own account of its cost: wall time per detect call and
+    per frame, and the number of frames per call. Batches from several
+    inference threads may be recorded at once.
+    """
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._lock = threading.Lock()
+        self.calls = RollingHistogram(window)
+        self.per_frame = RollingHistogram(window)
+        self.frames = 0
+
+    def record(self, start, end, frames=1):
+        with self._lock:
+            self.calls.add((end - start) * 1000.0)
+            self.per_frame.add((end - start) * 1000.0 / max(frames, 1))
+            self.frames += frames
+
+    def stats(self):
+        with self._lock:
+            calls = self.calls.total_count
+            return {
+                "calls": calls,
+                "frames": self.frames,
+                "mean_batch": self.frames / calls if calls else 0.0,
+                "call_ms": dict(zip(("p50", "p95", "p99"), self.calls.percentiles())),
+                "frame_ms": dict(zip(("p50", "p95", "p99"), self.per_frame.percentiles())),
+            }
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from actions import NullActions
+from gestures import GestureController
+from gesture_engine import GestureBindings
+from landmarks import NUM_LANDMARKS
+
+# A trace is a directory of flat binary files that can be memory-mapped back:
+#   frames.bin     FRAME_DTYPE per processed frame (hands or not)
+#   landmarks.bin  float32 (hands, 21, 3), normalized x/y/z, hands of all frames back to back
+#   hands.bin      HAND_DTYPE per hand, parallel to landmarks.bin
+#   meta.json      format version and the image size landmarks were computed on
+TRACE_VERSION = 1
+FRAME_DTYPE = np.dtype([("seq", "<i8"), ("timestamp", "<f8"), ("first_hand", "<i8"), ("num_hands", "<i4")])
+HAND_DTYPE = np.dtype([("handedness", "i1"), ("score", "<f4")])
+
+
+class TraceRecorder:
+    """
+    Appends every inference result to a landmark trace. Only numbers are
+    stored: no protobuf objects and no video.
+    """
+    def __init__(self, path, image_size=(640, 480)):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.image_size = image_size
+        self._frames = open(os.path.join(path, "frames.bin"), "wb")
+        self._landmarks = open(os.path.join(path, "landmarks.bin"), "wb")
+        self._hands = open(os.path.join(path, "hands.bin"), "wb")
+        self._frame_row = np.zeros(1, dtype=FRAME_DTYPE)
+        self._hand_rows = np.zeros(4, dtype=HAND_DTYPE)
+        self.num_frames = 0
+        self.num_hands = 0
+
+    def record(self, seq, timestamp, hands, handedness, scores=None, image_size=None):
+        """
+        Append one frame: `hands` is its (hands, 21, 3) landmark array,
+        `handedness` the matching HANDEDNESS codes.
+        """
+        if image_size is not None:
+            self.image_size = image_size
+        count = len(hands)
+        if count > len(self._hand_rows):
+            self._hand_rows = np.zeros(count, dtype=HAND_DTYPE)
+        rows = self._hand_rows[:count]
+        rows["handedness"] = handedness
+        rows["score"] = 0.0 if scores is None else scores
+
+        self._frame_row[0] = (seq, timestamp, self.num_hands, count)
+        self._frame_row.tofile(self._frames)
+        if count:
+            np.ascontiguousarray(hands, dtype=np.float32).tofile(self._landmarks)
+            rows.tofile(self._hands)
+        self.num_frames += 1
+        self.num_hands += count
+
+    def close(self):
+        for f in (self._frames, self._landmarks, self._hands):
+            f.close()
+        with open(os.path.join(self.path, "meta.json"), "w") as outfile:
+            json.dump({"version": TRACE_VERSION, "image_size": list(self.image_size),
+                       "frames": self.num_frames, "hands": self.num_hands}, outfile, indent=4)
+
+
+class TraceReader:
+    """Memory-maps a recorded trace; nothing is loaded until it is indexed."""
+    def __init__(self, path):
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                self.meta = json.load(file)
+        else:
+            # Recorder did not close cleanly; everything that was flushed is still readable
+            self.meta = {"version": TRACE_VERSION, "image_size": [640, 480]}
+        self.image_size = tuple(self.meta["image_size"])
+        self.frames = self._map("frames.bin", FRAME_DTYPE)
+        self.landmarks = self._map("landmarks.bin", np.float32, (NUM_LANDMARKS, 3))
+        self.hands = self._map("hands.bin", HAND_DTYPE)
+
+    def _map(self, name, dtype, item_shape=()):
+        file_path = os.path.join(self.path, name)
+        dtype = np.dtype(dtype)
+        item_size = dtype.itemsize * int(np.prod(item_shape, dtype=np.int64))
+        count = os.path.getsize(file_path) // item_size
+        if count == 0:
+            return np.zeros((0,) + item_shape, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=(count,) + item_shape)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame(self, i):
+        # (seq, timestamp, (hands, 21, 3) landmarks, handedness codes)
+        row = self.frames[i]
+        start, count = int(row["first_hand"]), int(row["num_hands"])
+        return (int(row["seq"]), float(row["timestamp"]),
+                self.landmarks[start:start + count], self.hands["handedness"][start:start + count])
+
+
+def replay_trace(reader, controller, repeat=1):
+    """
+    Feed a trace straight into a GestureController, skipping capture and
+    MediaPipe. Trace timestamps drive the controller's cooldowns, so the
+    outcome is the same however fast this runs. Returns frames handled.
+    """
+    image_size = reader.image_size
+    frames = reader.frames
+    # Plain ndarray view of the mapping: indexing a memmap subclass per hand is slow
+    landmarks = np.asarray(reader.landmarks)
+    handedness = np.asarray(reader.hands["handedness"])
+    duration = float(frames["timestamp"][-1] - frames["timestamp"][0]) + 1.0 if len(frames) else 0.0
+    handled = 0
+    for loop in range(repeat):
+        # Later passes are shifted in time so cooldowns behave like one long session
+        offset = loop * duration
+        for seq, timestamp, start, count in frames.tolist():
+            current_time = timestamp + offset
+            if hasattr(controller.actions, "time"):
+                controller.actions.time = current_time
+            if count:
+                controller.process_hands(landmarks[start:start + count], current_time, image_size,
+                                         handedness=handedness[start:start + count])
+            handled += 1
+    return handled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a landmark trace through the gesture logic")
+    parser.add_argument("trace", help="trace directory written by --record-landmarks")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the trace this many times")
+    parser.add_argument("--events", metavar="FILE",
+                        help="write the resulting action log as JSON, for regression diffs")
+    parser.add_argument("--config", metavar="FILE",
+                        help="gesture mappings to replay with (default: the built-in bindings)")
+    args = parser.parse_args()
+
+    reader = TraceReader(args.trace)
+    actions = NullActions(log=args.events is not None)
+    bindings = GestureBindings.load(args.config) if args.config else None
+    controller = GestureController(actions, bindings=bindings)
+    start = time.perf_counter()
+    handled = replay_trace(reader, controller, repeat=args.repeat)
+    elapsed = time.perf_counter() - start
+
+    print(f"{handled} frames ({reader.frames['num_hands'].sum() * args.repeat} hands) "
+          f"in {elapsed:.3f}s: {handled / elapsed if elapsed else 0:.0f} frames/s")
+    if args.events:
+        with open(args.events, "w") as outfile:
+            json.dump(actions.events, outfile, indent=1)
+
+if __name__ == "__main__":
+    main()
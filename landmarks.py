@@ -0,0 +1,88 @@
+import numpy as np
+
+# MediaPipe hand model indices
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_TIP = 12
+NUM_LANDMARKS = 21
+
+# Finger state: thumb compares x of tip vs. landmark 2, other fingers compare y of tip vs. PIP joint
+TIP_IDS = np.array([4, 8, 12, 16, 20])
+BASE_IDS = np.array([2, 6, 10, 14, 18])
+STATE_AXES = np.array([0, 1, 1, 1, 1])
+# [thumb, index, middle, ring, pinky] -> bitmask, thumb in the high bit (0b11111 = open palm)
+FINGER_BITS = np.array([16, 8, 4, 2, 1])
+
+# Flat (21 * 3) offsets of every coordinate the per-frame gesture logic reads, so one
+# gather pulls them all: finger tips/bases along their state axis, then x/y of the
+# index, thumb and middle tips
+FEATURE_TIP_IDS = [INDEX_TIP, THUMB_TIP, MIDDLE_TIP]
+FEATURE_IDS = np.concatenate([
+    TIP_IDS * 3 + STATE_AXES,
+    BASE_IDS * 3 + STATE_AXES,
+    np.array([[i * 3, i * 3 + 1] for i in FEATURE_TIP_IDS]).ravel(),
+])
+
+HANDEDNESS = {"Left": 0, "Right": 1}
+HANDEDNESS_LABELS = {v: k for k, v in HANDEDNESS.items()}
+
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+    (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+
+def results_to_array(results):
+    """
+    Convert a Hands.process result into a (hands, 21, 3) float32 array of
+    normalized x/y/z. This is the only place protobuf landmarks are read.
+    """
+    hands = results.multi_hand_landmarks
+    if not hands:
+        return np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+    return np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in hands], dtype=np.float32)
+
+
+def handedness_codes(results, count):
+    # HANDEDNESS code and score per hand (-1 when unknown), parallel to results_to_array
+    codes = np.full(count, -1, dtype=np.int8)
+    scores = np.zeros(count, dtype=np.float32)
+    for i, handedness in enumerate((results.multi_handedness or [])[:count]):
+        label = handedness.classification[0]
+        codes[i] = HANDEDNESS.get(label.label, -1)
+        scores[i] = label.score
+    return codes, scores
+
+
+def finger_states(points):
+    """Extended/folded booleans [thumb, index, middle, ring, pinky] for (..., 21, 3) landmarks."""
+    return points[..., TIP_IDS, STATE_AXES] < points[..., BASE_IDS, STATE_AXES]
+
+
+def finger_mask(points):
+    # finger_states packed into an int per hand, cheap to compare against pattern constants
+    return finger_states(points) @ FINGER_BITS
+
+
+def pattern_mask(pattern):
+    return int(np.dot(pattern, FINGER_BITS))
+
+
+def hand_features(hands, width, height):
+    """
+    Everything the gesture logic needs from (hands, 21, 3) landmarks in a
+    handful of array operations, returned as Python lists per hand:
+    finger masks, [[x, y] * 3] pixel coordinates of the index, thumb and
+    middle tips, and the normalized (x, y) of the index tip.
+    """
+    features = hands.reshape(len(hands), NUM_LANDMARKS * 3)[:, FEATURE_IDS]
+    masks = (features[:, :5] < features[:, 5:10]) @ FINGER_BITS
+    tips = features[:, 10:]
+    pixels = (tips * np.array([width, height] * 3, dtype=np.float64)).astype(np.int32)
+    return masks.tolist(), pixels.reshape(-1, 3, 2).tolist(), tips[:, :2].tolist()
+
+
+def to_pixels(points, width, height):
+    """(..., 21, 2) int32 pixel coordinates, truncated like int(x * width)."""
+    return (points[..., :2] * np.array([width, height], dtype=np.float64)).astype(np.int32)
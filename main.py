@@ -1,86 +1,251 @@
 import cv2 as cv
-import keyboard
-import mediapipe as mp
 import numpy as np
 import threading
-import math
 import time
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from ctypes import cast, POINTER
-import pyautogui
 from collections import deque
-import gui
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import functools
+import os
+import signal
+from frame_buffers import FrameBuffer, FrameRing, FrameSlot, FRAME_WIDTH, FRAME_HEIGHT
+from gestures import GestureController
+from actions import NullActions, ACTION_BACKENDS, DEFAULT_ACTIONS, create_actions
+from gesture_engine import CONFIG_PATH
+from config_service import ConfigWatcher
+from dispatcher import ActionDispatcher
+from motion_gate import InferenceGate, IDLE_AFTER
+from governor import QualityGovernor
+from roi import RoiTracker
+from scheduler import InferencePool, DEFAULT_WORKERS
+from hand_detector import HandDetector, SyntheticDetector, DETECTOR_BACKENDS, BATCHED_DETECTORS, DEFAULT_DETECTOR
+from inference_worker import InferenceProcess
+from cursor import CursorFilter, CursorEmitter, CURSOR_FILTERS, FILTER_ONE_EURO, FILTER_NONE, EMIT_RATE
+from landmarks import HAND_CONNECTIONS
+from landmark_trace import TraceRecorder
+from replay import ReplaySource, REPLAY_MODES, MODE_FAST
+from preview import PreviewRenderer, display_size, PREVIEW_FPS, PREVIEW_SCALE
+from capture import CameraSource, SyntheticCamera, BACKENDS, DEFAULT_BACKEND, DRIVER_BUFFERS, PIXEL_FORMATS
+from instrumentation import (PipelineMetrics, DispatchTimer, StartupTimer, new_stamps, T_READ_START, T_CAPTURED,
+                             T_FLIPPED, T_DEQUEUED, T_CONVERTED, T_INFERRED, T_FRAME)
 
 # Constants
-PINCH_COOLDOWN = 1.0
-PINCH_THRESHOLD = 30
-SWIPE_THRESHOLD = 50
-COOLDOWN = 1.0
-smooth_factor = 3
-SCROLL_INTERVAL = 0.05
 ACTIVATION_DURATION = 5 
+LATENCY_REPORT = "latency_stats.json"
 
-# Global variables with thread-safe locks
-frame_lock = threading.Lock()
-current_frame = None
-results_lock = threading.Lock()
-latest_results = None
+# Global variables; the frame ring, slots and metrics are built by main()/run_streams(),
+# so an inference worker process re-importing this module allocates none of them
 running = True
 detection_active = True
 last_activation_time = 0
 
-# MediaPipe setup
-mp_hands = mp.solutions.hands
-mp.solutions.hands.Hands().close()
-mp_drawing = mp.solutions.drawing_utils
-# Audio setup
 
-devices = AudioUtilities.GetSpeakers()
-interface = devices.Activate(IAudioEndpointVolume._iid_, 0, None)
-volume = cast(interface, POINTER(IAudioEndpointVolume))
-volRange = volume.GetVolumeRange()
-minVol, maxVol = volRange[0], volRange[1]
+def frame_slots():
+    # The two handoffs of one pipeline: capture -> inference -> gesture loop
+    # Value: FrameBuffer
+    frames = FrameSlot(retain=FrameBuffer.retain, release=FrameBuffer.release)
+    # Value: (FrameBuffer, (hands, 21, 3) landmarks, handedness codes),
+    # published under the seq/timestamp of the source frame
+    results = FrameSlot(retain=lambda item: item[0].retain(), release=lambda item: item[0].release())
+    return frames, results
 
 
 class VideoCaptureThread(threading.Thread):
-    def __init__(self):
+    def __init__(self, source, ring, frames, results, governor=None, stop_on_finish=True, startup=None):
         super().__init__()
-        self.cap = cv.VideoCapture(0)
-        self.cap.set(cv.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv.CAP_PROP_FPS, 30)
+        self.governor = governor
+        self.ring = ring
+        self.frames = frames
+        self.results = results
+        self.stop_on_finish = stop_on_finish
+        self.startup = startup
+        self.finished = False
+        # None or an int is a camera device index with the default capture settings
+        if source is None or isinstance(source, int):
+            source = CameraSource(source or 0)
+        # A CameraSource, or anything with VideoCapture's read()/release(), e.g. a ReplaySource
+        self.cap = source
+        self.camera = isinstance(source, CameraSource)
+        # Lossless sources never drop or overwrite frames, they wait for the pipeline instead
+        self.lossless = getattr(self.cap, "lossless", False)
+        self.raw = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        self.scaled = None
+        self.resolution = (FRAME_WIDTH, FRAME_HEIGHT)
+
+    def apply_resolution(self, resolution):
+        # Ask the camera for the governor's resolution; frames that still arrive larger are scaled down
+        self.resolution = resolution
+        if self.camera:
+            self.cap.set_resolution(resolution)
+
+    def capture_stats(self):
+        # Delivered FPS and frame age of a camera, for the latency report
+        return self.cap.stats() if self.camera else {}
 
     def run(self):
-        global current_frame, running
+        global running
         while running:
-            ret, frame = self.cap.read()
+            if self.governor is not None and self.governor.current["resolution"] != self.resolution:
+                self.apply_resolution(self.governor.current["resolution"])
+            # Decode straight into the reusable raw buffer
+            read_start = time.monotonic()
+            ret, raw = self.cap.read(self.raw)
             if ret:
-                with frame_lock:
-                    current_frame = cv.flip(frame, 1)
+                capture_time = time.monotonic()
+                # When the frame was taken, not when read() returned: a CameraSource knows
+                frame_time = getattr(self.cap, "frame_time", capture_time)
+                self.raw = raw
+                if self.governor is not None:
+                    self.governor.observe_capture(capture_time)
+                width = self.resolution[0]
+                if raw.shape[1] > width:
+                    # Keep the source's aspect ratio; the ring buffers take on the scaled shape
+                    height = round(raw.shape[0] * width / raw.shape[1])
+                    shape = (height, width, 3)
+                    if self.scaled is None or self.scaled.shape != shape:
+                        self.scaled = np.empty(shape, dtype=np.uint8)
+                    raw = cv.resize(raw, (width, height), dst=self.scaled, interpolation=cv.INTER_AREA)
+                buf = self.ring.acquire()
+                while buf is None and self.lossless and running:
+                    buf = self.ring.acquire(timeout=0.1)
+                if buf is None:
+                    # Every buffer is still in use downstream; drop this frame
+                    continue
+                buf.ensure_shape(raw.shape)
+                cv.flip(raw, 1, dst=buf.bgr)
+                buf.stamps[T_FRAME] = frame_time
+                if self.startup is not None:
+                    self.startup.mark("first_frame", capture_time)
+                buf.stamps[T_READ_START] = read_start
+                buf.stamps[T_CAPTURED] = capture_time
+                buf.stamps[T_FLIPPED] = time.monotonic()
+                if self.lossless:
+                    wait_for_consumer(self.frames)
+                self.frames.publish(buf, timestamp=capture_time)
+            elif getattr(self.cap, "finished", False):
+                self.finish()
+                break
         self.cap.release()
 
+    def finish(self):
+        # End of a replayed source: let the last result reach the gesture loop, then stop
+        global running
+        if self.lossless:
+            self.results.wait_taken(self.frames.seq, timeout=5.0)
+        self.finished = True
+        if self.stop_on_finish:
+            running = False
+
+class FrameProcessor:
+    """
+    Per-stream inference step: takes one (seq, capture time, FrameBuffer)
+    item from a frame slot, runs the detector and publishes the landmarks
+    to the stream's results slot. Driven by HandProcessingThread, or by
+    the shared InferencePool (scheduler.py) in multi-stream mode, which
+    may run `begin`, one detect_batch call for several streams and
+    `finish` instead of `process`.
+    """
+    def __init__(self, results, lossless=False, recorder=None, gate=None, governor=None, detector=None,
+                 stream=0):
+        self.stream = stream
+        self.lossless = lossless
+        self.recorder = recorder
+        self.gate = gate
+        self.governor = governor
+        self.results = results
+        self.skipped = 0
+        self.skip = 0
+        # Published for frames the gate skips, so the preview and gesture loop still advance
+        self.no_hands = np.zeros((0, 21, 3), dtype=np.float32)
+        self.no_handedness = np.zeros(0, dtype=np.int8)
+        # Any backend with the detector interface (see hand_detector.py)
+        self.detector = detector if detector is not None else HandDetector()
+
+    def process(self, item):
+        request = self.begin(item)
+        if request is not None:
+            self.finish(item, self.detector.detect_batch([request])[0])
+
+    def begin(self, item):
+        """
+        The detector input (stream, bgr, capture time, rgb buffer) for a
+        frame slot item, or None if the frame is skipped or gated; those
+        are already dealt with.
+        """
+        seq, capture_time, buf = item
+        if buf is None:
+            return None
+        governor = self.governor
+        if governor is not None:
+            tier = governor.current
+            self.detector.set_model_complexity(tier["model_complexity"])
+            # Frame skipping: drop frames outright instead of publishing empty results
+            if self.skip < tier["frame_skip"]:
+                self.skip += 1
+                self.skipped += 1
+                buf.release()
+                return None
+            self.skip = 0
+
+        buf.stamps[T_DEQUEUED] = time.monotonic()
+        if self.gate is not None and not self.gate.should_process(buf.bgr, capture_time):
+            if self.lossless:
+                wait_for_consumer(self.results)
+            self.results.publish((buf, self.no_hands, self.no_handedness), seq=seq, timestamp=capture_time)
+            return None
+        # The RGB conversion goes into the buffer's own plane; our reference moves on to the results slot
+        return self.stream, buf.bgr, capture_time, buf.rgb
+
+    def finish(self, item, result):
+        # Publish the detector's (hands, handedness, scores, converted_at) for the item begin() passed on
+        seq, capture_time, buf = item
+        hands, handedness, scores, converted_at = result
+        buf.stamps[T_CONVERTED] = converted_at
+        if self.gate is not None:
+            self.gate.report(len(hands) > 0, capture_time)
+        buf.stamps[T_INFERRED] = time.monotonic()
+        if self.governor is not None:
+            self.governor.observe(buf.stamps[T_INFERRED] - buf.stamps[T_DEQUEUED], buf.stamps[T_INFERRED])
+        if self.recorder is not None:
+            self.recorder.record(seq, capture_time, hands, handedness, scores,
+                                 image_size=(buf.bgr.shape[1], buf.bgr.shape[0]))
+        if self.lossless:
+            wait_for_consumer(self.results)
+        self.results.publish((buf, hands, handedness), seq=seq, timestamp=capture_time)
+
+    def close(self):
+        self.detector.close()
+
 class HandProcessingThread(threading.Thread):
-    def __init__(self):
+    def __init__(self, frames, results, lossless=False, recorder=None, gate=None, governor=None, detector=None):
         super().__init__()
-        self.hands = mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7,
-            model_complexity=1
-        )
+        self.frames = frames
+        self.processor = FrameProcessor(results, lossless, recorder, gate, governor, detector)
 
     def run(self):
-        global latest_results, running
-        while running:
-            with frame_lock:
-                frame = current_frame.copy() if current_frame is not None else None
-            
-            if frame is not None:
-                rgb_frame = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
-                results = self.hands.process(rgb_frame)
-                with results_lock:
-                    latest_results = results
+        global running
+        last_seq = 0
+        try:
+            while running:
+                # Block until the capture thread delivers a frame we have not processed yet
+                item = self.frames.wait_newer(last_seq, timeout=0.1)
+                if item is None:
+                    continue
+                last_seq = item[0]
+                try:
+                    self.processor.process(item)
+                except RuntimeError:
+                    # An inference worker that exits while we are stopping is part of the stop
+                    if running:
+                        raise
+                    item[2].release()
+        finally:
+            self.processor.close()
+
+def wait_for_consumer(slot):
+    # Block until the slot's current value has been taken (or we are shutting down)
+    while running and not slot.wait_taken(slot.seq, timeout=0.1):
+        pass
 
 class CvFpsCalc:
     def __init__(self, buffer_len=1):
@@ -97,36 +262,59 @@ class CvFpsCalc:
         fps = 1000.0 / (sum(self._difftimes) / len(self._difftimes))
         return round(fps, 2)
 
-def detect_swipe(prev_x, curr_x, threshold):
-    displacement = curr_x - prev_x
-    if abs(displacement) > threshold:
-        return "right" if displacement > 0 else "left"
-    return None
-
-def detect_fingers(hand_landmarks):
-    fingers = []
-    fingers.append(1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[2].x else 0)
-    for tip, base in zip([8, 12, 16, 20], [6, 10, 14, 18]):
-        fingers.append(1 if hand_landmarks.landmark[tip].y < hand_landmarks.landmark[base].y else 0)
-    return fingers
-
-def calculate_distance(point1, point2):
-    return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-
-def draw_info(image, fps, mode):
+def draw_info(image, fps, mode, metrics=None, governor=None, scale=1.0):
     status_color = (0, 255, 0) if detection_active else (0, 0, 255)
     status_text = f"Active ({mode})" if detection_active else "INACTIVE"
     
-    cv.putText(image, f"FPS: {fps}", (10, 30), 
-              cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-    cv.putText(image, status_text, (10, 70), 
-              cv.FONT_HERSHEY_SIMPLEX, 1, status_color, 2)
+    cv.putText(image, f"FPS: {fps}", (10, int(30 * scale)),
+              cv.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 2)
+    cv.putText(image, status_text, (10, int(70 * scale)),
+              cv.FONT_HERSHEY_SIMPLEX, scale, status_color, 2)
+    # The tier and latency table need the full-size layout
+    if scale < 1.0:
+        return image
+
+    if governor is not None:
+        cv.putText(image, governor.overlay_text(), (image.shape[1] - 290, 30),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+    # Per-stage latency p50/p95/p99, bottom right
+    if metrics is not None:
+        lines = metrics.overlay_lines()
+        x = image.shape[1] - 290
+        y = image.shape[0] - 10 - 18 * len(lines)
+        cv.putText(image, "stage       p50   p95   p99", (x, y),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+        for i, line in enumerate(lines):
+            cv.putText(image, line, (x, y + 18 * (i + 1)),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
     return image
 
-def detect_pinch(index_tip, thumb_tip, threshold=PINCH_THRESHOLD):
-    distance = calculate_distance(index_tip, thumb_tip)
-    return distance < threshold
+def action_stats(actions):
+    # Per-action call times of a TimedActions backend for the latency report
+    stats = getattr(actions, "stats", None)
+    return stats() if stats is not None else None
 
+def close_actions(actions):
+    # Releases virtual input devices and display connections, once the dispatcher is done
+    close = getattr(actions, "close", None)
+    if close is not None:
+        close()
+
+
+def draw_hand_landmarks(frame, pixels):
+    # Same look as mp_drawing.draw_landmarks, but from the (21, 2) pixel array
+    points = [tuple(p) for p in pixels.tolist()]
+    for start, end in HAND_CONNECTIONS:
+        cv.line(frame, points[start], points[end], (250, 44, 250), 2)
+    for point in points:
+        cv.circle(frame, point, 4, (121, 22, 76), 2)
+
+
+def request_stop(signum=None, frame=None):
+    # Signal handler for headless runs: every loop winds down and writes its reports
+    global running
+    running = False
 
 def handle_activation():
     global detection_active, last_activation_time
@@ -135,168 +323,507 @@ def handle_activation():
         last_activation_time = time.time()
         
 
-# Set up global hotkey
-keyboard.add_hotkey('ctrl+space', handle_activation)
-keyboard_thread = threading.Thread(target=keyboard.wait)
-keyboard_thread.daemon = True
-keyboard_thread.start()
-
-def main():
+def start_hotkey_listener():
+    # Only from __main__: worker processes re-import this module and must not grab the hotkey
+    import keyboard
+    keyboard.add_hotkey('ctrl+space', handle_activation)
+    keyboard_thread = threading.Thread(target=keyboard.wait)
+    keyboard_thread.daemon = True
+    keyboard_thread.start()
+
+def open_source(source, startup):
+    # The capture source main() runs on; cameras are opened here, off the caller's thread
+    if callable(source):
+        source = source()
+    elif source is None or isinstance(source, int):
+        source = CameraSource(source or 0)
+    startup.mark("camera_open")
+    return source
+
+def create_detector(model_complexity=1, roi_tracking=True, inference_process=False, max_hands=1,
+                    backend=DEFAULT_DETECTOR, synthetic_latency=None, startup=None):
+    # HandDetector in this process or behind an InferenceProcess, either loading the MediaPipe graph,
+    # or the synthetic backend for load tests
+    if backend == "synthetic" and inference_process:
+        raise ValueError("the synthetic detector does not run in an inference process")
+    if backend == "synthetic":
+        detector = SyntheticDetector(synthetic_latency, model_complexity=model_complexity, max_num_hands=max_hands)
+    elif inference_process:
+        detector = InferenceProcess(model_complexity, roi_tracking=roi_tracking, max_hands=max_hands)
+    else:
+        detector = HandDetector(model_complexity, roi=RoiTracker(max_hands=max_hands) if roi_tracking else None,
+                                max_num_hands=max_hands)
+    if startup is not None:
+        startup.mark("detector_ready")
+    return detector
+
+def action_latency(metrics):
+    # Typical time from handing an action to the dispatcher until the OS call returns, in seconds
+    summary = metrics.summary()
+    if not summary:
+        return 0.0
+    return (summary["os_queue"]["p50"] + summary["os_call"]["p50"]) / 1000.0
+
+def main(source=None, show_window=True, actions_enabled=True, record_path=None,
+         cursor_filter=FILTER_ONE_EURO, cursor_rate=EMIT_RATE, idle_after=IDLE_AFTER, adaptive=True,
+         roi_tracking=True, inference_process=False, max_hands=1, config_path=CONFIG_PATH,
+         preview_fps=PREVIEW_FPS, preview_scale=PREVIEW_SCALE, actions_backend=DEFAULT_ACTIONS,
+         detector_backend=DEFAULT_DETECTOR, synthetic_latency=None, startup=None):
+    """
+    Run the gesture pipeline. `source` is a camera index, a CameraSource
+    (see capture.py), a ReplaySource (see replay.py) or a callable that
+    opens one; `show_window` and `actions_enabled` turn off imshow (and
+    all drawing) and OS input for replay, CI and headless runs.
+    `record_path` saves every landmark result as a trace (see
+    landmark_trace.py). `cursor_filter` picks the cursor
+    smoothing from cursor.py; `cursor_rate` > 0 moves the cursor at that
+    rate from a CursorEmitter thread instead of once per result.
+    `idle_after` > 0 enables the motion/hand-presence inference gate.
+    `adaptive` lets a QualityGovernor (governor.py) trade model
+    complexity, resolution and frame rate for latency; lossless replays
+    have no deadline, so it is never used for them.
+    `roi_tracking` runs inference on a crop around the tracked hand
+    (see roi.py) and only falls back to the full frame to find it.
+    `inference_process` moves inference into a worker process that
+    exchanges frames and landmarks through shared memory.
+    `max_hands` > 1 tracks several hands, each with its own gesture
+    state, and enables the two-hand gestures.
+    `config_path` is the mappings.json the gesture bindings come from;
+    saving it (e.g. from the settings GUI) takes effect immediately.
+    `preview_fps` caps how often the window is redrawn (0: every
+    result) and `preview_scale` < 1 draws it smaller (see preview.py).
+    `actions_backend` picks how OS input is sent (see actions.py);
+    "null" runs the whole action path without touching the OS.
+    `detector_backend` "synthetic" replaces MediaPipe with scripted
+    landmarks at a simulated cost (see hand_detector.py).
+    `startup` is the StartupTimer the milestones go to, a new one by
+    default.
+    """
     global running, detection_active, last_activation_time
-    screen_width, screen_height = pyautogui.size()
     cv_fps = CvFpsCalc(buffer_len=10)
-    
+    startup = startup if startup is not None else StartupTimer()
+    startup.mark("main")
+    frame_ring = FrameRing()
+    frame_slot, results_slot = frame_slots()
+    metrics = PipelineMetrics()
+
+    # The camera, the detector (MediaPipe import and graph load) and the OS action backends
+    # each take a while to come up and do not depend on each other, so they start side by side
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+        opening = pool.submit(open_source, source, startup)
+        lossless = getattr(source, "lossless", False)
+        governor = QualityGovernor() if adaptive and not lossless else None
+        model_complexity = governor.current["model_complexity"] if governor is not None else 1
+        loading = pool.submit(create_detector, model_complexity, roi_tracking, inference_process, max_hands,
+                              detector_backend, synthetic_latency, startup)
+        # OS input backends are only loaded when actions are actually sent
+        system_actions = create_actions(actions_backend) if actions_enabled else NullActions(log=False)
+        startup.mark("actions_ready")
+        source = opening.result()
+        detector = loading.result()
+
     # Start threads
-    video_thread = VideoCaptureThread()
-    processing_thread = HandProcessingThread()
+    video_thread = VideoCaptureThread(source, frame_ring, frame_slot, results_slot, governor, startup=startup)
+    recorder = TraceRecorder(record_path) if record_path else None
+    gate = InferenceGate(idle_after, metrics=metrics) if idle_after > 0 else None
+    processing_thread = HandProcessingThread(frame_slot, results_slot, lossless=video_thread.lossless,
+                                             recorder=recorder, gate=gate, governor=governor, detector=detector)
     video_thread.start()
     processing_thread.start()
 
     # Local variables
-    mode = 'N'
-    active = 0
-    prev_index_x = None
-    last_swipe_time = 0
-    last_pinch_time = 0
-    last_scroll_time = 0
-    volBar = 400
-    volPer = 0
+    last_results_seq = 0
+    preview = PreviewRenderer("Hand Gesture Control", preview_fps, preview_scale, enabled=show_window)
+    stamps = new_stamps()
+    dispatch = DispatchTimer(enabled=actions_enabled)
+    # OS input runs on its own thread; the gesture loop only enqueues
+    actions = ActionDispatcher(system_actions, metrics)
+    if actions_enabled:
+        actions.start()
+    smoother = CursorFilter(cursor_filter) if cursor_filter != FILTER_NONE else None
+    emitter = None
+    if cursor_rate > 0 and actions_enabled:
+        emitter = CursorEmitter(actions, lambda: running, rate=cursor_rate)
+        emitter.start()
+    controller = GestureController(actions, dispatch, draw_landmarks=draw_hand_landmarks,
+                                   cursor_filter=smoother, cursor_emitter=emitter)
+    watcher = ConfigWatcher(config_path, lambda: running)
+    watcher.subscribe(lambda bindings: setattr(controller, "bindings", bindings))
+    watcher.start()
 
     while running:
-        
-        fps = cv_fps.get()
         frame = None
-        results = None
+        hands = None
         
         if detection_active:
             detection_active = True
             
-        
-        with frame_lock:
-            if current_frame is not None:
-                frame = current_frame.copy()
-        
-        with results_lock:
-            results = latest_results
-
-        if frame is not None and results is not None:
-            status_text = "Active" if detection_active else "Inactive"
+        # Wait for the next inference result; `frame` is the exact frame it was computed on
+        item = results_slot.wait_newer(last_results_seq, timeout=0.03)
+        if item is not None:
+            last_results_seq, capture_time, (buf, hands, handedness) = item
+            picked_up = time.monotonic()
+            startup.mark("first_result", picked_up)
+            dispatch.reset()
+            image_size = display_size(buf.bgr.shape)
+            # Only results the preview is about to show are copied and drawn on
+            if preview.due(picked_up):
+                frame = preview.frame(buf)
+            np.copyto(stamps, buf.stamps)
+            buf.release()
+            fps = cv_fps.get()
+
+        if hands is not None:
             if detection_active:
-              
-            
-              if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    fingers = detect_fingers(hand_landmarks)
-                    
-                    index_tip = hand_landmarks.landmark[8]
-                    index_x, index_y = int(index_tip.x * frame.shape[1]), int(index_tip.y * frame.shape[0])
-                    thumb_tip = hand_landmarks.landmark[4]
-                    thumb_x, thumb_y = int(thumb_tip.x * frame.shape[1]), int(thumb_tip.y * frame.shape[0])
-                    current_time = time.time()
-
-                    # Pinch detection
-                    if current_time - last_pinch_time > PINCH_COOLDOWN:
-                        if detect_pinch((index_x, index_y), (thumb_x, thumb_y)):
-                            
-                            last_pinch_time = current_time
-                            cv.circle(frame, (index_x, index_y), 10, (0, 0, 255), -1)
-                            cv.putText(frame, "Pinch Detected", (50, 150), cv.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-                            pyautogui.hotkey('space')
-                            
-
-                    # Swipe detection
-                    if prev_index_x is not None:
-                        if current_time - last_swipe_time > COOLDOWN:
-                            swipe_direction = detect_swipe(prev_index_x, index_x, SWIPE_THRESHOLD)
-                            if swipe_direction:
-                                last_swipe_time = current_time
-                                if swipe_direction == "right":
-                                    pyautogui.hotkey('ctrl', 'right')
-                                else:
-                                    pyautogui.hotkey('ctrl', 'left')
-                                
-                    prev_index_x = index_x
-
-                    # Mode detection
-                    if fingers == [1, 1, 1, 1, 1]:
-                        mode = 'N'
-                        active = 0
-                        mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(121, 22, 76), thickness=2, circle_radius=4),
-                    mp_drawing.DrawingSpec(color=(250, 44, 250), thickness=2)
-                )
-                    elif fingers == [1, 1, 0, 0, 0] and active == 0:
-                        mode = 'Volume'
-                        active = 1
-                    elif fingers == [0, 1, 1, 0, 0] and active == 0:
-                        mode = 'Scroll'
-                        active = 1
-                    elif fingers == [0, 1, 0, 0, 0] and active == 0:
-                        mode = 'Cursor'
-                        active = 1
-
-                    # Mode handling
-                    if mode == 'Cursor':
-                        target_x = int(index_tip.x * screen_width)
-                        target_y = int(index_tip.y * screen_height)
-                        pyautogui.moveTo(target_x, target_y)
-
-                    elif mode == 'Volume':
-                        length = math.hypot(index_x - thumb_x, index_y - thumb_y)
-                        vol = np.clip(np.interp(length, [20, 150], [minVol, maxVol]), minVol, maxVol)
-                        volBar = np.clip(np.interp(length, [50, 200], [400, 150]), 150, 400)
-                        volPer = np.clip(np.interp(length, [50, 200], [0, 100]), 0, 100)
-                        volume.SetMasterVolumeLevel(vol, None)
-                        cv.circle(frame, (thumb_x, thumb_y), 10, (0, 255, 0), cv.FILLED)
-                        cv.circle(frame, (index_x, index_y), 10, (0, 255, 0), cv.FILLED)
-                        cv.line(frame, (thumb_x, thumb_y), (index_x, index_y), (0, 255, 0), 3)
-                        cv.rectangle(frame, (50, 150), (85, 400), (0, 255, 0), 3)
-                        cv.rectangle(frame, (50, int(volBar)), (85, 400), (0, 255, 0), cv.FILLED)
-                        cv.putText(frame, f'{int(volPer)}%', (40, 450), cv.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-                    elif mode == 'Scroll' and current_time - last_scroll_time > SCROLL_INTERVAL:
-                        if current_time - last_scroll_time > SCROLL_INTERVAL:
-                             middle_tip = hand_landmarks.landmark[12]
-                             middle_x, middle_y = int(middle_tip.x * frame.shape[1]), int(middle_tip.y * frame.shape[0])
-                             
-                             scroll_distance = middle_y - index_y
-                             scroll_speed = int(scroll_distance / smooth_factor)
-                             pyautogui.scroll(scroll_speed)
-                             last_scroll_time = current_time
-                             
-                             
-                             cv.circle(frame, (index_x, index_y), 10, (255, 0, 0), cv.FILLED)
-                             cv.circle(frame, (middle_x, middle_y), 10, (255, 0, 0), cv.FILLED)
-                             cv.line(frame, (index_x, index_y), (middle_x, middle_y), (255, 0, 0), 3)
-
-                         # Limit scrolling frequency
-                        
-                    
-                    
-
-            current_mode = mode if detection_active else "Disabled"
-            frame = draw_info(frame, fps, current_mode)
+                if smoother is not None:
+                    # Extrapolate the cursor over the frame's age plus the usual OS dispatch delay
+                    smoother.lead_time = time.monotonic() - capture_time + action_latency(metrics)
+                if emitter is not None:
+                    emitter.lead_offset = action_latency(metrics)
+                actions.set_origin(stamps[T_CAPTURED], metrics)
+                controller.process_hands(hands, capture_time, image_size, frame if preview.full_scale else None,
+                                         handedness)
+                if len(hands):
+                    startup.mark("first_hand")
+                if dispatch.last_end is not None and startup.mark("first_gesture", dispatch.last_end):
+                    print(f"Startup: {startup.summary()}")
+
+            gesture_time = time.monotonic() - picked_up - dispatch.elapsed
+            metrics.record_frame(stamps, picked_up, gesture_time, dispatch.elapsed, dispatch.last_end,
+                                 total=not dispatch.enabled)
+
+        if frame is not None:
+            current_mode = controller.mode if detection_active else "Disabled"
+            if gate is not None and gate.idle:
+                current_mode += ", idle"
+            frame = draw_info(frame, fps, current_mode, metrics, governor, preview.scale)
             if fps < 25:
-               cv.putText(frame, "LOW FPS WARNING", (10, 110), 
-               cv.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-            cv.imshow("Hand Gesture Control", frame)
+               cv.putText(frame, "LOW FPS WARNING", (10, int(110 * preview.scale)),
+               cv.FONT_HERSHEY_SIMPLEX, preview.scale, (0,0,255), 2)
+            preview.show(frame)
 
-        if cv.waitKey(1) & 0xFF == 27:
+        if preview.escape_pressed():
             running = False
             break
 
     video_thread.join()
     processing_thread.join()
+    if emitter is not None:
+        emitter.join()
+    if actions.is_alive():
+        actions.stop()
+        actions.join()
+    close_actions(system_actions)
+    if recorder is not None:
+        recorder.close()
+    metrics.dump(LATENCY_REPORT, capture=video_thread.capture_stats(), startup=startup.marks,
+                 actions=action_stats(system_actions), detector=detector.stats())
+    cv.destroyAllWindows()
+
+class Stream:
+    """
+    One source of the multi-stream pipeline with everything that is kept
+    per stream: frame ring and slots, capture thread, detector with its
+    tracking state, gesture state machine, cursor filter and metrics.
+    Inference runs on the shared InferencePool, OS actions go through the
+    shared ActionDispatcher. `detector` is a backend shared with other
+    streams (keyed by `index`); by default the stream loads its own.
+    `actions_metrics` are the dispatcher's metrics, `startup` the run's
+    StartupTimer.
+    """
+    def __init__(self, index, source, actions, actions_enabled=True, cursor_filter=FILTER_ONE_EURO,
+                 idle_after=IDLE_AFTER, roi_tracking=True, inference_process=False, max_hands=1,
+                 bindings=None, show_window=False, preview_fps=PREVIEW_FPS, preview_scale=PREVIEW_SCALE,
+                 detector=None, actions_metrics=None, startup=None):
+        self.index = index
+        self.window = f"Hand Gesture Control [{index}]"
+        self.ring = FrameRing()
+        self.frame_slot, self.results_slot = frame_slots()
+        self.metrics = PipelineMetrics()
+        self.actions_metrics = actions_metrics if actions_metrics is not None else self.metrics
+        self.startup = startup if startup is not None else StartupTimer()
+        self.capture = VideoCaptureThread(source, self.ring, self.frame_slot, self.results_slot,
+                                          stop_on_finish=False, startup=self.startup)
+        self.gate = InferenceGate(idle_after, metrics=self.metrics) if idle_after > 0 else None
+        if detector is None:
+            detector = create_detector(roi_tracking=roi_tracking, inference_process=inference_process,
+                                       max_hands=max_hands, startup=self.startup)
+        self.processor = FrameProcessor(self.results_slot, self.capture.lossless, gate=self.gate, detector=detector,
+                                        stream=index)
+        self.dispatch = DispatchTimer(enabled=actions_enabled)
+        self.smoother = CursorFilter(cursor_filter) if cursor_filter != FILTER_NONE else None
+        self.controller = GestureController(actions, self.dispatch, draw_landmarks=draw_hand_landmarks,
+                                            cursor_filter=self.smoother, bindings=bindings)
+        self.fps = CvFpsCalc(buffer_len=10)
+        self.last_seq = 0
+        self.preview = PreviewRenderer(self.window, preview_fps, preview_scale, enabled=show_window)
+        self.stamps = new_stamps()
+
+    def handle(self, item):
+        # One inference result: gestures, metrics and the preview for this stream
+        self.last_seq, capture_time, (buf, hands, handedness) = item
+        picked_up = time.monotonic()
+        self.dispatch.reset()
+        image_size = display_size(buf.bgr.shape)
+        frame = self.preview.frame(buf) if self.preview.due(picked_up) else None
+        np.copyto(self.stamps, buf.stamps)
+        buf.release()
+        fps = self.fps.get()
+
+        if detection_active:
+            if self.smoother is not None:
+                self.smoother.lead_time = time.monotonic() - capture_time + action_latency(self.actions_metrics)
+            self.controller.actions.set_origin(self.stamps[T_CAPTURED], self.metrics)
+            self.controller.process_hands(hands, capture_time, image_size,
+                                          frame if self.preview.full_scale else None, handedness)
+            if self.dispatch.last_end is not None and self.startup.mark("first_gesture", self.dispatch.last_end):
+                print(f"Startup: {self.startup.summary()}")
+        gesture_time = time.monotonic() - picked_up - self.dispatch.elapsed
+        self.metrics.record_frame(self.stamps, picked_up, gesture_time, self.dispatch.elapsed,
+                                  self.dispatch.last_end, total=not self.dispatch.enabled)
+        if frame is None:
+            return
+
+        current_mode = self.controller.mode if detection_active else "Disabled"
+        if self.gate is not None and self.gate.idle:
+            current_mode += ", idle"
+        draw_info(frame, fps, current_mode, self.metrics, scale=self.preview.scale)
+        self.preview.show(frame)
+
+    def report_path(self):
+        root, ext = os.path.splitext(LATENCY_REPORT)
+        return f"{root}_{self.index}{ext}"
+
+
+def run_streams(sources, workers=DEFAULT_WORKERS, show_window=True, actions_enabled=True,
+                cursor_filter=FILTER_ONE_EURO, idle_after=IDLE_AFTER, roi_tracking=True,
+                inference_process=False, max_hands=1, config_path=CONFIG_PATH, preview_fps=PREVIEW_FPS,
+                preview_scale=PREVIEW_SCALE, actions_backend=DEFAULT_ACTIONS, detector_backend=DEFAULT_DETECTOR,
+                synthetic_latency=None, batch=1, startup=None):
+    """
+    Run one gesture pipeline per source (camera index, CameraSource or ReplaySource),
+    with inference for all of them on a pool of `workers` threads.
+    Each stream writes its own latency report (latency_stats_<n>.json).
+    Cursor moves are sent once per result; the governor and the
+    CursorEmitter are single-stream only.
+    `detector_backend` "synthetic" replaces MediaPipe with one
+    SyntheticDetector for all streams (`synthetic_latency`: seconds per
+    frame). `batch` > 1 lets a pool thread hand the frames of up to that
+    many streams to the detector in one detect_batch call; only backends
+    in BATCHED_DETECTORS take batches.
+    """
+    global running
+    startup = startup if startup is not None else StartupTimer()
+    if batch > 1 and detector_backend not in BATCHED_DETECTORS:
+        raise ValueError(f"the {detector_backend} detector processes one frame at a time, batching only "
+                         f"takes streams away from the other pool threads")
+    system_actions = create_actions(actions_backend) if actions_enabled else NullActions(log=False)
+    # The dispatcher's own OS timings; each action's total goes to its stream's metrics
+    metrics = PipelineMetrics()
+    actions = ActionDispatcher(system_actions, metrics)
+    if actions_enabled:
+        actions.start()
+    watcher = ConfigWatcher(config_path, lambda: running)
+    shared = None
+    if detector_backend != DEFAULT_DETECTOR:
+        shared = create_detector(max_hands=max_hands, backend=detector_backend, synthetic_latency=synthetic_latency,
+                                 startup=startup)
+    streams = [Stream(i, source, actions, actions_enabled, cursor_filter, idle_after, roi_tracking,
+                      inference_process, max_hands, watcher.bindings, show_window, preview_fps, preview_scale,
+                      shared, metrics, startup)
+               for i, source in enumerate(sources)]
+    batched = shared if batch > 1 else None
+    for stream in streams:
+        watcher.subscribe(lambda bindings, controller=stream.controller: setattr(controller, "bindings", bindings))
+    watcher.start()
+    pool = InferencePool(streams, lambda: running, workers, detector=batched, batch=batch,
+                         stop=request_stop)
+    for stream in streams:
+        stream.capture.start()
+    pool.start()
+
+    while running:
+        handled = False
+        for stream in streams:
+            item = stream.results_slot.wait_newer(stream.last_seq, timeout=0)
+            if item is not None:
+                stream.handle(item)
+                handled = True
+        if all(stream.capture.finished for stream in streams):
+            running = False
+        if show_window:
+            if cv.waitKey(1) & 0xFF == 27:
+                running = False
+        elif not handled:
+            time.sleep(0.002)
+
+    for stream in streams:
+        stream.capture.join()
+    pool.join()
+    if actions.is_alive():
+        actions.stop()
+        actions.join()
+    close_actions(system_actions)
+    for stream in streams:
+        stream.processor.close()
+        # The action backend is shared, so every report has the same action timings
+        stream.metrics.dump(stream.report_path(), capture=stream.capture.capture_stats(), startup=startup.marks,
+                            actions=action_stats(system_actions), detector=stream.processor.detector.stats())
     cv.destroyAllWindows()
+    return streams
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hand gesture control")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="video file or image directory to use instead of the camera")
+    parser.add_argument("--replay-mode", choices=REPLAY_MODES, default=MODE_FAST,
+                        help="fast: as fast as possible, realtime: paced to the recording")
+    parser.add_argument("--replay-fps", type=float, default=None,
+                        help="frame rate for image directories or videos without timestamps")
+    parser.add_argument("--loop", action="store_true", help="restart the replay when it ends")
+    parser.add_argument("--no-window", action="store_true", help="do not open the OpenCV window")
+    parser.add_argument("--no-actions", action="store_true",
+                        help="recognise gestures but do not send any OS input")
+    parser.add_argument("--record-landmarks", metavar="DIR",
+                        help="save every landmark result to a trace directory")
+    parser.add_argument("--cursor-filter", choices=CURSOR_FILTERS, default=FILTER_ONE_EURO,
+                        help="cursor smoothing and latency prediction")
+    parser.add_argument("--idle-after", type=float, default=IDLE_AFTER,
+                        help="seconds without hand or motion before inference drops to idle rate (0: never)")
+    parser.add_argument("--cursor-rate", type=float, default=EMIT_RATE,
+                        help="cursor updates per second, interpolated between results (0: one per result)")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="always run full quality instead of shedding load when the machine falls behind")
+    parser.add_argument("--full-frame", action="store_true",
+                        help="run inference on the whole frame instead of a crop around the tracked hand")
+    parser.add_argument("--inference-process", action="store_true",
+                        help="run hand inference in a separate process fed through shared memory")
+    parser.add_argument("--source", action="append", metavar="SOURCE",
+                        help="camera index, video/image directory or 'synthetic'; repeat for several streams "
+                             "(runs without the settings GUI)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="inference threads shared by all --source streams")
+    parser.add_argument("--max-hands", type=int, default=1,
+                        help="hands to track; 2 enables two-hand gestures (detection then runs more often)")
+    parser.add_argument("--config", default=CONFIG_PATH,
+                        help="gesture mappings, modes and settings (as written by the settings GUI)")
+    parser.add_argument("--camera-backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="OpenCV capture backend for cameras")
+    parser.add_argument("--pixel-format", choices=PIXEL_FORMATS, default=None,
+                        help="camera pixel format (default: the driver's)")
+    parser.add_argument("--camera-buffers", type=int, default=DRIVER_BUFFERS,
+                        help="frames the camera driver may queue; each one can add a frame period of latency")
+    parser.add_argument("--synthetic-camera", action="store_true",
+                        help="use a generated real-time test pattern instead of camera 0")
+    parser.add_argument("--preview-fps", type=float, default=PREVIEW_FPS,
+                        help="most preview window redraws per second (0: one per result)")
+    parser.add_argument("--preview-scale", type=float, default=PREVIEW_SCALE,
+                        help="preview window size relative to the frame, e.g. 0.5 (gesture overlays need 1)")
+    parser.add_argument("--actions-backend", choices=ACTION_BACKENDS, default=DEFAULT_ACTIONS,
+                        help="how OS input is sent: pyautogui/pycaw, native Linux input (XTest or uinput), "
+                             "or null to measure the action path without sending anything")
+    parser.add_argument("--detector", choices=DETECTOR_BACKENDS, default=DEFAULT_DETECTOR,
+                        help="hand landmark backend; synthetic produces scripted hands at a simulated cost, "
+                             "for load tests")
+    parser.add_argument("--synthetic-latency", type=float, default=None, metavar="MS",
+                        help="simulated inference time per frame of the synthetic detector")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="frames of up to this many --source streams per detector call")
+    parser.add_argument("--headless", action="store_true",
+                        help="run as a background service: no OpenCV window, no settings GUI, no hotkey; "
+                             "stop with SIGTERM or Ctrl+C")
+    args = parser.parse_args()
+    if args.headless:
+        args.no_window = True
+    if args.batch > 1 and args.detector not in BATCHED_DETECTORS:
+        parser.error(f"--batch needs a detector that processes batches ({', '.join(BATCHED_DETECTORS)})")
+    if args.detector == "synthetic" and args.inference_process:
+        parser.error("--inference-process runs MediaPipe; it cannot be combined with --detector synthetic")
+    return args
+
+def open_camera(index, args, synthetic=False):
+    # A camera with the capture options from the command line; `synthetic` generates frames instead
+    if synthetic:
+        return CameraSource(index, backend="synthetic", pixel_format=args.pixel_format,
+                            buffers=args.camera_buffers, cap=SyntheticCamera())
+    return CameraSource(index, backend=args.camera_backend, pixel_format=args.pixel_format,
+                        buffers=args.camera_buffers)
 
 if __name__ == "__main__":
+    # MediaPipe, the OS input backends (actions.py), keyboard and the Tk GUI are loaded when first needed
+    startup = StartupTimer()
+    startup.mark("imported")
+    args = parse_args()
+    if args.headless:
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+    synthetic_latency = args.synthetic_latency / 1000.0 if args.synthetic_latency is not None else None
+    if args.replay:
+        # Offline replay runs in the foreground without the settings GUI
+        source = ReplaySource(args.replay, mode=args.replay_mode, fps=args.replay_fps, loop=args.loop)
+        main(source, show_window=not args.no_window, actions_enabled=not args.no_actions,
+             record_path=args.record_landmarks, cursor_filter=args.cursor_filter,
+             cursor_rate=args.cursor_rate, idle_after=args.idle_after, adaptive=not args.fixed_quality,
+             roi_tracking=not args.full_frame, inference_process=args.inference_process,
+             max_hands=args.max_hands, config_path=args.config, preview_fps=args.preview_fps,
+             preview_scale=args.preview_scale, actions_backend=args.actions_backend,
+             detector_backend=args.detector, synthetic_latency=synthetic_latency, startup=startup)
+        print(f"Replayed {source.frames_read} frames at {source.throughput():.1f} fps")
+        raise SystemExit(0)
+
+    if args.source:
+        # Multi-stream runs in the foreground, each stream in its own window
+        sources = [open_camera(int(source), args) if source.isdigit() else
+                   open_camera(0, args, synthetic=True) if source == "synthetic" else
+                   ReplaySource(source, mode=args.replay_mode, fps=args.replay_fps, loop=args.loop)
+                   for source in args.source]
+        if not args.headless and any(isinstance(source, CameraSource) for source in sources):
+            start_hotkey_listener()
+        streams = run_streams(sources, workers=args.workers, show_window=not args.no_window,
+                              actions_enabled=not args.no_actions, cursor_filter=args.cursor_filter,
+                              idle_after=args.idle_after, roi_tracking=not args.full_frame,
+                              inference_process=args.inference_process, max_hands=args.max_hands,
+                              config_path=args.config, preview_fps=args.preview_fps,
+                              preview_scale=args.preview_scale, actions_backend=args.actions_backend,
+                              detector_backend=args.detector, synthetic_latency=synthetic_latency,
+                              batch=args.batch, startup=startup)
+        for stream in streams:
+            total = stream.metrics.summary(max_age=0)["total"]
+            print(f"Stream {stream.index}: {stream.metrics.frames} frames at {stream.metrics.fps():.1f} fps, "
+                  f"total p50 {total['p50']:.1f} ms")
+        raise SystemExit(0)
+
+    options = {
+        # Opened on one of main()'s startup threads, while the detector loads
+        "source": functools.partial(open_camera, 0, args, synthetic=args.synthetic_camera),
+        "show_window": not args.no_window,
+        "actions_enabled": not args.no_actions,
+        "record_path": args.record_landmarks,
+        "cursor_filter": args.cursor_filter,
+        "cursor_rate": args.cursor_rate,
+        "idle_after": args.idle_after,
+        "adaptive": not args.fixed_quality,
+        "roi_tracking": not args.full_frame,
+        "inference_process": args.inference_process,
+        "max_hands": args.max_hands,
+        "config_path": args.config,
+        "preview_fps": args.preview_fps,
+        "preview_scale": args.preview_scale,
+        "actions_backend": args.actions_backend,
+        "detector_backend": args.detector,
+        "synthetic_latency": synthetic_latency,
+        "startup": startup,
+    }
+    if args.headless:
+        main(**options)
+        raise SystemExit(0)
+
+    start_hotkey_listener()
     # Start gesture control in a background thread
-    gesture_thread = threading.Thread(target=main)
+    gesture_thread = threading.Thread(target=main, kwargs=options)
     gesture_thread.daemon = True  # Terminates when main thread exits
     gesture_thread.start()
-    
-    # Launch GUI in the main thread
-    gui.run_ui()
\ No newline at end of file
+
+    # Launch GUI in the main thread; Tk loads while the pipeline starts up
+    import gui
+    gui.run_ui(args.config)
\ No newline at end of file
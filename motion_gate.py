@@ -0,0 +1,82 @@
+import time
+import cv2 as cv
+import numpy as np
+
+IDLE_AFTER = 10.0         # seconds without a hand or motion before dropping to idle
+IDLE_RATE = 2.0           # detections per second while idle
+MOTION_SIZE = (80, 60)    # motion is checked on a grayscale thumbnail this size
+MOTION_PIXEL_DELTA = 18   # gray-level change that counts a thumbnail pixel as moving
+MOTION_FRACTION = 0.01    # share of moving pixels that counts as motion
+
+
+class InferenceGate:
+    """
+    Decides per frame whether HandProcessingThread runs Hands.process.
+
+    Active: every frame is processed. After `idle_after` seconds with no
+    hand and no motion the gate goes idle and only lets a frame through
+    every 1 / `idle_rate` seconds. In idle, a cheap frame difference on a
+    downscaled grayscale thumbnail wakes it straight back up.
+    Wake-up latency (triggering frame to first detected hand) is
+    reported to `metrics` as the "wake" stage.
+    """
+    def __init__(self, idle_after=IDLE_AFTER, idle_rate=IDLE_RATE, metrics=None):
+        self.idle_after = idle_after
+        self.idle_interval = 1.0 / idle_rate
+        self.metrics = metrics
+        width, height = MOTION_SIZE
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        self._previous = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._have_previous = False
+        self._motion_pixels = int(MOTION_FRACTION * width * height)
+
+        self.last_activity = time.monotonic()
+        self.last_idle_check = 0.0
+        self.idle = False
+        self.wake_time = None      # capture time of the frame that woke us, until a hand shows up
+        self.skipped = 0
+
+    def _motion(self, bgr):
+        cv.resize(bgr, MOTION_SIZE, dst=self._small, interpolation=cv.INTER_AREA)
+        cv.cvtColor(self._small, cv.COLOR_BGR2GRAY, dst=self._gray)
+        if not self._have_previous:
+            self._have_previous = True
+            self._previous, self._gray = self._gray, self._previous
+            return False
+        cv.absdiff(self._gray, self._previous, dst=self._diff)
+        self._previous, self._gray = self._gray, self._previous
+        cv.threshold(self._diff, MOTION_PIXEL_DELTA, 255, cv.THRESH_BINARY, dst=self._diff)
+        return cv.countNonZero(self._diff) >= self._motion_pixels
+
+    def should_process(self, bgr, now):
+        if not self.idle:
+            if now - self.last_activity < self.idle_after:
+                return True
+            self.idle = True
+            self.wake_time = None
+            self._have_previous = False
+
+        if self._motion(bgr):
+            self.idle = False
+            self.last_activity = now
+            self.wake_time = now
+            return True
+        if now - self.last_idle_check >= self.idle_interval:
+            self.last_idle_check = now
+            return True
+        self.skipped += 1
+        return False
+
+    def report(self, hand_present, now):
+        # Called with each inference outcome
+        if not hand_present:
+            return
+        if self.idle or self.wake_time is not None:
+            wake_from = self.wake_time if self.wake_time is not None else now
+            if self.metrics is not None:
+                self.metrics.record("wake", time.monotonic() - wake_from)
+            self.wake_time = None
+        self.idle = False
+        self.last_activity = now
@@ -0,0 +1,73 @@
+import time
+import cv2 as cv
+import numpy as np
+from frame_buffers import FRAME_WIDTH, FRAME_HEIGHT
+
+PREVIEW_FPS = 15.0      # the debug window does not need the inference rate
+PREVIEW_SCALE = 1.0
+
+
+def display_size(shape):
+    # (width, height) results are handled at: frames from a lowered governor tier count as the
+    # nominal size, so pixel thresholds and overlays do not change with the tier
+    if shape[1] < FRAME_WIDTH:
+        return FRAME_WIDTH, FRAME_HEIGHT
+    return shape[1], shape[0]
+
+
+class PreviewRenderer:
+    """
+    The OpenCV debug window, kept off the gesture path's budget: a result
+    is only copied and drawn on when it is due to be shown, at most
+    `max_fps` times a second (0: every result), into a private buffer of
+    `scale` times the nominal size, so the pooled frame is released right
+    away. Nothing is drawn while disabled (no window, headless) or after
+    the user closed the window; gesture control keeps running either way.
+    """
+    def __init__(self, window, max_fps=PREVIEW_FPS, scale=PREVIEW_SCALE, enabled=True):
+        self.window = window
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.scale = scale
+        self.enabled = enabled
+        self.display = None
+        self.shown = False
+        self.last_shown = 0.0
+        self.rendered = 0
+
+    @property
+    def full_scale(self):
+        # Gesture feedback is drawn in nominal pixel coordinates, so only on full-size previews
+        return self.scale == 1.0
+
+    def due(self, now):
+        """True if the result picked up at `now` should be drawn and shown."""
+        if not self.enabled or now - self.last_shown < self.interval:
+            return False
+        if self.shown and cv.getWindowProperty(self.window, cv.WND_PROP_VISIBLE) < 1:
+            # Closed by the user: imshow would only open it again
+            self.enabled = False
+            return False
+        return True
+
+    def frame(self, buf):
+        # Copy of the result's frame at preview size, to draw on
+        width, height = display_size(buf.bgr.shape)
+        shape = (int(height * self.scale), int(width * self.scale), 3)
+        if self.display is None or self.display.shape != shape:
+            self.display = np.empty(shape, dtype=np.uint8)
+        if shape == buf.bgr.shape:
+            np.copyto(self.display, buf.bgr)
+        else:
+            interpolation = cv.INTER_AREA if shape[1] < buf.bgr.shape[1] else cv.INTER_LINEAR
+            cv.resize(buf.bgr, (shape[1], shape[0]), dst=self.display, interpolation=interpolation)
+        return self.display
+
+    def show(self, frame):
+        cv.imshow(self.window, frame)
+        self.shown = True
+        self.last_shown = time.monotonic()
+        self.rendered += 1
+
+    def escape_pressed(self):
+        # Pumps the window's events; only while there is a window
+        return self.shown and self.enabled and cv.waitKey(1) & 0xFF == 27
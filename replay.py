@@ -0,0 +1,110 @@
+import os
+import time
+import cv2 as cv
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+DEFAULT_FPS = 30.0
+
+MODE_FAST = "fast"          # as fast as the pipeline consumes frames, nothing dropped
+MODE_REALTIME = "realtime"  # paced to the recording's timestamps, drops like a live camera
+REPLAY_MODES = (MODE_FAST, MODE_REALTIME)
+
+
+class ReplaySource:
+    """
+    Stand-in for cv.VideoCapture(0) that reads a video file or a directory
+    of images, so the normal capture/processing/gesture path can run
+    without a camera.
+
+    In fast mode `lossless` is set and the capture thread waits for each
+    frame to be consumed before publishing the next. In realtime mode read()
+    sleeps until the frame's original timestamp.
+    """
+    def __init__(self, path, mode=MODE_FAST, fps=None, loop=False):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.loop = loop
+        self.lossless = mode == MODE_FAST
+        self.finished = False
+        self.frames_read = 0
+        self.start_time = None
+        self.end_time = None
+
+        self.cap = None
+        self.files = None
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            if not self.files:
+                raise ValueError(f"No images found in {path}")
+            self.fps = fps or DEFAULT_FPS
+        else:
+            self.cap = cv.VideoCapture(path)
+            if not self.cap.isOpened():
+                raise ValueError(f"Could not open video {path}")
+            self.fps = fps or self.cap.get(cv.CAP_PROP_FPS) or DEFAULT_FPS
+
+        self._index = 0
+        self._loop_offset = 0.0   # media time already played in previous loops
+        self._last_media_time = 0.0
+
+    def _next(self, image):
+        # Returns (ret, image, media_time) for the next frame of one pass
+        if self.cap is not None:
+            ret, image = self.cap.read(image)
+            media_time = self.cap.get(cv.CAP_PROP_POS_MSEC) / 1000.0 if ret else 0.0
+            if ret and media_time <= 0.0 and self._index > 0:
+                # Some containers report no timestamps
+                media_time = self._index / self.fps
+        else:
+            if self._index >= len(self.files):
+                return False, image, 0.0
+            image = cv.imread(self.files[self._index])
+            ret = image is not None
+            media_time = self._index / self.fps
+        if ret:
+            self._index += 1
+        return ret, image, media_time
+
+    def _rewind(self):
+        self._loop_offset += self._last_media_time + 1.0 / self.fps
+        self._index = 0
+        if self.cap is not None:
+            self.cap.set(cv.CAP_PROP_POS_FRAMES, 0)
+
+    def read(self, image=None):
+        if self.finished:
+            return False, image
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+
+        ret, image, media_time = self._next(image)
+        if not ret and self.loop and self._index > 0:
+            self._rewind()
+            ret, image, media_time = self._next(image)
+        if not ret:
+            self.finished = True
+            self.end_time = time.monotonic()
+            return False, image
+
+        self._last_media_time = media_time
+        if self.mode == MODE_REALTIME:
+            delay = self.start_time + self._loop_offset + media_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_read += 1
+        return True, image
+
+    def throughput(self):
+        end = self.end_time or time.monotonic()
+        if self.start_time is None or end <= self.start_time:
+            return 0.0
+        return self.frames_read / (end - self.start_time)
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,102 @@
+import cv2 as cv
+import numpy as np
+
+ROI_SIZE = 256          # crops are resized to this square, so inference cost does not grow with resolution
+ROI_MARGIN = 0.35       # extra space around the landmark bounding box, per side, relative to its size
+MIN_ROI = 96            # smallest crop side in frame pixels
+MAX_VELOCITY_GAP = 0.2  # do not extrapolate from samples further apart than this (seconds)
+REDETECT_INTERVAL = 0.5 # full-frame look for more hands while fewer than max_hands are tracked
+
+
+class RoiTracker:
+    """
+    Predicts where the tracked hand will be in the next frame from the
+    last landmarks, so inference can run on a square crop around it
+    instead of the whole frame.
+
+    The crop is the landmark bounding box plus ROI_MARGIN, shifted along
+    the box's velocity and grown by the distance it may travel. It is
+    resized to ROI_SIZE x ROI_SIZE; `to_frame` maps landmarks from the
+    crop back to full-frame normalized coordinates. Once the hand is not
+    found in the crop, `region` returns None until a full-frame detection
+    picks it up again. With `max_hands` > 1 the crop covers every tracked
+    hand, and while fewer are tracked a full frame is checked every
+    REDETECT_INTERVAL seconds for new ones.
+    """
+    def __init__(self, size=ROI_SIZE, margin=ROI_MARGIN, max_hands=1):
+        self.size = size
+        self.margin = margin
+        self.max_hands = max_hands
+        self.count = 0
+        self.last_full = 0.0
+        self.bgr = np.empty((size, size, 3), dtype=np.uint8)
+        self.rgb = np.empty((size, size, 3), dtype=np.uint8)
+        self.box = None          # (center x, center y, side) in frame pixels at last_time
+        self.velocity = (0.0, 0.0)
+        self.last_time = None
+        self.lost = 0
+        self.crops = 0
+
+    def region(self, frame_shape, now):
+        """Square (x0, y0, side) crop for the frame captured at `now`, or None for full-frame detection."""
+        if self.box is None:
+            return None
+        if self.count < self.max_hands and now - self.last_full >= REDETECT_INTERVAL:
+            self.last_full = now
+            return None
+        height, width = frame_shape[:2]
+        cx, cy, side = self.box
+        dt = now - self.last_time
+        vx, vy = self.velocity
+        cx, cy = cx + vx * dt, cy + vy * dt
+        side = max(side * (1.0 + 2.0 * self.margin) + 2.0 * max(abs(vx), abs(vy)) * dt, MIN_ROI)
+        if side >= min(width, height):
+            return None
+        side = int(side)
+        # Keep the square inside the frame by shifting it rather than shrinking it
+        x0 = min(max(int(cx - side / 2), 0), width - side)
+        y0 = min(max(int(cy - side / 2), 0), height - side)
+        return x0, y0, side
+
+    def crop(self, bgr, region):
+        # Crop, scale and convert to RGB in the tracker's own buffers; returns the RGB crop
+        x0, y0, side = region
+        cv.resize(bgr[y0:y0 + side, x0:x0 + side], (self.size, self.size), dst=self.bgr,
+                  interpolation=cv.INTER_AREA if side > self.size else cv.INTER_LINEAR)
+        cv.cvtColor(self.bgr, cv.COLOR_BGR2RGB, dst=self.rgb)
+        self.crops += 1
+        return self.rgb
+
+    @staticmethod
+    def to_frame(hands, region, frame_shape):
+        # In place: (hands, 21, 3) crop-normalized landmarks -> frame-normalized
+        x0, y0, side = region
+        height, width = frame_shape[:2]
+        hands[..., 0] *= side / width
+        hands[..., 0] += x0 / width
+        hands[..., 1] *= side / height
+        hands[..., 1] += y0 / height
+        # MediaPipe scales z like x
+        hands[..., 2] *= side / width
+        return hands
+
+    def update(self, hands, frame_shape, now):
+        """Track the frame-normalized `hands` (or lose them when there are none)."""
+        self.count = len(hands)
+        if not len(hands):
+            if self.box is not None:
+                self.lost += 1
+            self.box = None
+            self.last_time = None
+            return
+        height, width = frame_shape[:2]
+        x_min, y_min = hands[..., 0].min() * width, hands[..., 1].min() * height
+        x_max, y_max = hands[..., 0].max() * width, hands[..., 1].max() * height
+        cx, cy = (x_min + x_max) / 2.0, (y_min + y_max) / 2.0
+        if self.box is not None and 0 < now - self.last_time < MAX_VELOCITY_GAP:
+            dt = now - self.last_time
+            self.velocity = ((cx - self.box[0]) / dt, (cy - self.box[1]) / dt)
+        else:
+            self.velocity = (0.0, 0.0)
+        self.box = (cx, cy, max(x_max - x_min, y_max - y_min))
+        self.last_time = now
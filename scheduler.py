@@ -0,0 +1,132 @@
+import threading
+
+DEFAULT_WORKERS = 2
+
+
+class InferencePool:
+    """
+    Bounded pool of inference threads shared by several streams.
+
+    Each stream offers `frame_slot` (latest captured frame) and
+    `processor` (its own detector, tracking state and result slot, with
+    a `process(item)` method). A free worker takes the next stream, in
+    round-robin order after the one served last, that has a frame it has
+    not processed and is not already being processed. That way every
+    stream gets an equal share when the pool is saturated: a slow
+    machine lowers every stream's frame rate rather than starving one.
+    A stream's frames are never processed concurrently, so per-stream
+    tracking state needs no locking.
+
+    With a shared `detector` (see hand_detector.py) a worker claims up
+    to `batch` ready streams at once and runs their frames through one
+    detect_batch call between each processor's `begin` and `finish`. It
+    never waits for a batch to fill: whatever is ready goes. A claim is
+    capped at the streams' fair share per worker, so batching never
+    leaves a worker idle while another one serves every stream.
+
+    A worker that fails releases the frames it still holds, reports the
+    error and calls `stop`, so the pipeline winds down instead of
+    silently losing a thread.
+    """
+    def __init__(self, streams, is_running, workers=DEFAULT_WORKERS, detector=None, batch=1, stop=None):
+        self.streams = streams
+        self.stop = stop
+        self.detector = detector
+        fair_share = -(-len(streams) // max(workers, 1))
+        self.batch = max(min(batch, fair_share), 1) if detector is not None else 1
+        self.is_running = is_running
+        self._cond = threading.Condition()
+        self._last_seq = [0] * len(streams)
+        self._busy = [False] * len(streams)
+        self._next = 0
+        self.served = [0] * len(streams)
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max(workers, 1))]
+        for stream in streams:
+            stream.frame_slot.on_publish = self.wake
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def _claim(self):
+        # Indices of the next streams to serve (up to `batch`), or None once the pipeline stops
+        count = len(self.streams)
+        with self._cond:
+            while self.is_running():
+                claimed = []
+                for k in range(count):
+                    i = (self._next + k) % count
+                    if not self._busy[i] and self.streams[i].frame_slot.seq != self._last_seq[i]:
+                        self._busy[i] = True
+                        claimed.append(i)
+                        if len(claimed) == self.batch:
+                            break
+                if claimed:
+                    self._next = claimed[-1] + 1
+                    return claimed
+                # Timeout so a stop is noticed even without new frames
+                self._cond.wait(0.1)
+        return None
+
+    def _work(self):
+        while True:
+            claimed = self._claim()
+            if claimed is None:
+                return
+            # (processor, item) pairs whose FrameBuffer reference is still ours
+            held = []
+            try:
+                for i in claimed:
+                    item = self.streams[i].frame_slot.wait_newer(self._last_seq[i], timeout=0)
+                    if item is not None:
+                        self._last_seq[i] = item[0]
+                        self.served[i] += 1
+                        held.append((self.streams[i].processor, item))
+                if self.detector is None:
+                    while held:
+                        processor, item = held[0]
+                        processor.process(item)
+                        del held[0]
+                else:
+                    self._process_batch(held)
+            except Exception as e:
+                for _, item in held:
+                    item[2].release()
+                # A detector that exits while we are stopping is part of the stop
+                if self.is_running():
+                    print(f"Inference worker failed: {e!r}")
+                    if self.stop is not None:
+                        self.stop()
+                return
+            finally:
+                with self._cond:
+                    for i in claimed:
+                        self._busy[i] = False
+                    # Other workers may be waiting for exactly these streams
+                    self._cond.notify_all()
+
+    def _process_batch(self, held):
+        # Frames the gate or frame skipping let through go to the detector together.
+        # Items leave `held` as they are handed on, the first len(requests) wait for the detector.
+        requests = []
+        while len(held) > len(requests):
+            processor, item = held[len(requests)]
+            request = processor.begin(item)
+            if request is None:
+                del held[len(requests)]
+            else:
+                requests.append(request)
+        if not requests:
+            return
+        for result in self.detector.detect_batch(requests):
+            processor, item = held[0]
+            processor.finish(item, result)
+            del held[0]
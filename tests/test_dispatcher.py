@@ -0,0 +1,73 @@
+from actions import NullActions
+from dispatcher import ActionDispatcher
+from instrumentation import PipelineMetrics
+
+
+def drain(dispatcher):
+    # Everything queued so far goes out in one pass of the thread
+    dispatcher.start()
+    dispatcher.stop()
+    dispatcher.join(timeout=5)
+    assert not dispatcher.is_alive()
+
+
+def test_continuous_updates_are_coalesced():
+    actions = NullActions()
+    dispatcher = ActionDispatcher(actions)
+    for x in range(3):
+        dispatcher.move_to(x, 10)
+    dispatcher.scroll(1)
+    dispatcher.scroll(2)
+    dispatcher.set_volume(-20.0)
+    dispatcher.set_volume(-10.0)
+    drain(dispatcher)
+    assert actions.events == [(0.0, "move_to", 2, 10), (0.0, "scroll", 3), (0.0, "set_volume", -10.0)]
+    assert dispatcher.coalesced == 4
+
+
+def test_hotkeys_run_in_order_after_continuous_updates():
+    actions = NullActions()
+    dispatcher = ActionDispatcher(actions)
+    dispatcher.hotkey("ctrl", "c")
+    dispatcher.move_to(5, 5)
+    dispatcher.hotkey("ctrl", "v")
+    drain(dispatcher)
+    assert [event[1:] for event in actions.events] == [("move_to", 5, 5), ("hotkey", "ctrl", "c"),
+                                                        ("hotkey", "ctrl", "v")]
+
+
+def test_full_queue_drops_hotkeys():
+    actions = NullActions()
+    dispatcher = ActionDispatcher(actions, max_pending=2)
+    for key in "abc":
+        dispatcher.hotkey(key)
+    drain(dispatcher)
+    assert [event[2] for event in actions.events] == ["a", "b"]
+    assert dispatcher.dropped == 1
+
+
+class FailingActions(NullActions):
+    def move_to(self, x, y):
+        raise RuntimeError("fail-safe")
+
+
+def test_failed_call_does_not_stop_the_thread(capsys):
+    actions = FailingActions()
+    dispatcher = ActionDispatcher(actions)
+    dispatcher.move_to(0, 0)
+    dispatcher.hotkey("esc")
+    drain(dispatcher)
+    assert dispatcher.failed == 1
+    assert [event[1:] for event in actions.events] == [("hotkey", "esc")]
+    assert "move_to" in capsys.readouterr().out
+
+
+def test_total_is_recorded_for_the_origin_stream():
+    stream = PipelineMetrics()
+    dispatcher = ActionDispatcher(NullActions(), PipelineMetrics())
+    dispatcher.set_origin(0.0, stream)
+    dispatcher.hotkey("a")
+    dispatcher.set_origin(0.0, None)
+    dispatcher.hotkey("b")
+    drain(dispatcher)
+    assert stream.summary(max_age=0)["total"]["count"] == 1
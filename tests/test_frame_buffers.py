@@ -0,0 +1,78 @@
+from frame_buffers import FrameBuffer, FrameRing, FrameSlot
+
+
+def results_slot():
+    return FrameSlot(retain=lambda item: item[0].retain(), release=lambda item: item[0].release())
+
+
+def test_ring_runs_dry_and_recycles():
+    ring = FrameRing(size=2, width=8, height=6)
+    first, second = ring.acquire(), ring.acquire()
+    assert first.bgr.shape == (6, 8, 3)
+    assert ring.acquire() is None
+    assert ring.dropped == 1
+    first.retain()
+    first.release()
+    assert ring.free_count() == 0
+    first.release()
+    assert ring.free_count() == 1
+    assert ring.acquire() is first
+    assert first.refs == 1
+    second.release()
+
+
+def test_ensure_shape_only_reallocates_on_change():
+    ring = FrameRing(size=1, width=8, height=6)
+    buf = ring.acquire()
+    bgr = buf.bgr
+    buf.ensure_shape((6, 8, 3))
+    assert buf.bgr is bgr
+    buf.ensure_shape((4, 8, 3))
+    assert buf.bgr.shape == (4, 8, 3)
+
+
+def test_slot_holds_one_reference_and_gives_readers_their_own():
+    ring = FrameRing(size=3, width=8, height=6)
+    slot = FrameSlot(retain=FrameBuffer.retain, release=FrameBuffer.release)
+    buf = ring.acquire()
+    seq = slot.publish(buf)
+    seq, _, read = slot.wait_newer(0, timeout=0)
+    assert read is buf and buf.refs == 2
+    assert slot.wait_newer(seq, timeout=0) is None
+    read.release()
+    # Publishing over it drops the slot's reference
+    slot.publish(ring.acquire())
+    assert buf.refs == 0
+    assert ring.free_count() == 2
+    slot.clear()
+    assert ring.free_count() == 3
+
+
+def test_frames_flow_through_both_slots_without_leaking():
+    ring = FrameRing(size=4, width=8, height=6)
+    frames = FrameSlot(retain=FrameBuffer.retain, release=FrameBuffer.release)
+    results = results_slot()
+    frame_seq = results_seq = 0
+    for _ in range(50):
+        buf = ring.acquire()
+        assert buf is not None
+        frames.publish(buf)
+        # Inference: its reference moves on to the results slot
+        item = frames.wait_newer(frame_seq, timeout=0)
+        frame_seq = item[0]
+        results.publish((item[2], None, None), seq=frame_seq)
+        # Gesture loop
+        item = results.wait_newer(results_seq, timeout=0)
+        results_seq = item[0]
+        item[2][0].release()
+    frames.clear()
+    results.clear()
+    assert ring.free_count() == 4
+
+
+def test_wait_taken():
+    slot = FrameSlot()
+    seq = slot.publish("a")
+    assert not slot.wait_taken(seq, timeout=0)
+    slot.latest()
+    assert slot.wait_taken(seq, timeout=0)
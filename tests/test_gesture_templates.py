@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from gesture_templates import BAND, TEMPLATE_POINTS, TemplateSet, prepare
+
+
+def stroke(points, count=40):
+    # Normalized fingertip coordinates along a polyline
+    points = np.asarray(points, dtype=np.float64)
+    segments = [np.linspace(a, b, count // (len(points) - 1), endpoint=False) for a, b in zip(points, points[1:])]
+    path = np.concatenate(segments + [points[-1:]])
+    return path[:, 0], path[:, 1]
+
+
+def reference_dtw(query, template, band=BAND):
+    # Plain banded DTW, one cell at a time
+    count = len(query)
+    cost = np.full((count + 1, count + 1), np.inf)
+    cost[0, 0] = 0.0
+    for i in range(1, count + 1):
+        for j in range(max(1, i - band), min(count, i + band) + 1):
+            step = np.hypot(*(query[i - 1] - template[j - 1]))
+            cost[i, j] = step + min(cost[i - 1, j], cost[i, j - 1], cost[i - 1, j - 1])
+    return cost[count, count]
+
+
+@pytest.fixture
+def templates():
+    shapes = {
+        "check": [(0.3, 0.5), (0.4, 0.6), (0.6, 0.3)],
+        "zigzag": [(0.2, 0.3), (0.4, 0.6), (0.6, 0.3), (0.8, 0.6)],
+        "line": [(0.2, 0.5), (0.8, 0.5)],
+        "caret": [(0.3, 0.6), (0.5, 0.3), (0.7, 0.6)],
+    }
+    return TemplateSet([(name, prepare(*stroke(points))) for name, points in shapes.items()])
+
+
+def test_prepare_shape():
+    query = prepare(*stroke([(0.1, 0.1), (0.9, 0.4)]))
+    assert query.shape == (TEMPLATE_POINTS, 2)
+    assert query.dtype == np.float32
+
+
+def test_match_finds_the_drawn_template(templates):
+    rng = np.random.default_rng(1)
+    x, y = stroke([(0.32, 0.52), (0.41, 0.63), (0.62, 0.31)], count=60)
+    query = prepare(x + rng.normal(0, 0.003, len(x)), y + rng.normal(0, 0.003, len(y)))
+    name, distance = templates.match(query)
+    assert name == "check"
+    assert distance < 0.08
+
+
+def test_unlike_stroke_matches_nothing(templates):
+    angle = np.linspace(0, 2 * np.pi, 60)
+    query = prepare(0.5 + 0.2 * np.cos(angle), 0.5 + 0.2 * np.sin(angle))
+    assert templates.match(query) is None
+
+
+def test_bounds_enclose_the_dtw_cost(templates):
+    rng = np.random.default_rng(2)
+    for _ in range(5):
+        query = prepare(*stroke(rng.uniform(0.2, 0.8, (3, 2))))
+        lower, upper = templates.bounds(query)
+        for k in range(len(templates)):
+            cost = reference_dtw(query, templates.templates[k])
+            assert lower[k] <= cost + 1e-4
+            assert cost <= upper[k] + 1e-4
+
+
+def test_vectorized_dtw_matches_reference(templates):
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        query = prepare(*stroke(rng.uniform(0.2, 0.8, (4, 2))))
+        candidates = np.arange(len(templates))
+        index, cost = templates._dtw(query, candidates, np.inf)
+        costs = [reference_dtw(query, template) for template in templates.templates]
+        assert index == int(np.argmin(costs))
+        assert cost == pytest.approx(min(costs), rel=1e-4)
+
+
+def test_early_abandon_under_a_tight_limit(templates):
+    query = prepare(*stroke([(0.2, 0.2), (0.8, 0.8)]))
+    candidates = np.arange(len(templates))
+    costs = [reference_dtw(query, template) for template in templates.templates]
+    assert templates._dtw(query, candidates, min(costs) * 0.5) is None
+    index, _ = templates._dtw(query, candidates, min(costs) * 1.01)
+    assert index == int(np.argmin(costs))
+
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from actions import NullActions
+from gesture_engine import DOUBLE_TAP_WINDOW, GestureBindings
+from gestures import GestureController, HandTracker
+from hand_detector import synthetic_hand
+
+FPS = 30
+POINTING = [0, 1, 0, 0, 0]
+
+
+def hand_at(x, y):
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[:, 0], points[:, 1] = x, y
+    return points
+
+
+def test_lone_hand_keeps_its_track():
+    tracker = HandTracker()
+    first = tracker.assign(hand_at(0.3, 0.5)[None], None, 0.0)
+    assert tracker.assign(hand_at(0.7, 0.5)[None], None, 1.0) == first
+
+
+def test_tracks_follow_the_wrists_not_the_order():
+    tracker = HandTracker()
+    left, right = hand_at(0.2, 0.5), hand_at(0.8, 0.5)
+    ids = tracker.assign(np.stack([left, right]), np.array([0, 1]), 0.0)
+    assert len(set(ids)) == 2
+    swapped = tracker.assign(np.stack([hand_at(0.78, 0.5), hand_at(0.22, 0.5)]), np.array([1, 0]), 0.1)
+    assert swapped == ids[::-1]
+
+
+def test_handedness_breaks_a_near_tie():
+    tracker = HandTracker()
+    ids = tracker.assign(np.stack([hand_at(0.45, 0.5), hand_at(0.55, 0.5)]), np.array([0, 1]), 0.0)
+    # Both hands moved towards each other's old spot, but kept their handedness
+    moved = tracker.assign(np.stack([hand_at(0.54, 0.5), hand_at(0.46, 0.5)]), np.array([0, 1]), 0.1)
+    assert moved == ids
+
+
+def test_a_hand_returning_gets_its_old_track():
+    tracker = HandTracker()
+    ids = tracker.assign(np.stack([hand_at(0.2, 0.5), hand_at(0.8, 0.5)]), None, 0.0)
+    tracker.assign(hand_at(0.8, 0.5)[None], None, 1.0)
+    again = tracker.assign(np.stack([hand_at(0.21, 0.5), hand_at(0.8, 0.5)]), None, 2.0)
+    assert again == ids
+
+
+def test_oldest_track_is_dropped_beyond_the_limit():
+    tracker = HandTracker(max_tracks=2)
+    ids = tracker.assign(np.stack([hand_at(0.1, 0.5), hand_at(0.9, 0.5)]), None, 0.0)
+    tracker.assign(hand_at(0.9, 0.5)[None], None, 1.0)
+    new = tracker._new_track()
+    assert set(tracker.tracks) == {ids[1], new}
+
+
+@pytest.fixture
+def bindings():
+    return GestureBindings({"mappings": {"Tap": "space", "Double Tap": "esc"},
+                            "gesture_settings": {"gesture_timeout": 1.5}})
+
+
+def run_pinches(bindings, pinches, end=3.0, hand_leaves=None):
+    """
+    Hotkeys sent for a pointing hand pinching during each (start, end)
+    of `pinches`, in seconds; from `hand_leaves` on no hand is seen.
+    """
+    actions = NullActions()
+    controller = GestureController(actions, bindings=bindings)
+    rng = np.random.default_rng(0)
+    for i in range(int(end * FPS)):
+        t = 10.0 + i / FPS
+        actions.time = round(t - 10.0, 3)
+        if hand_leaves is not None and t - 10.0 >= hand_leaves:
+            controller.process_hands(np.zeros((0, 21, 3), dtype=np.float32), t, (640, 480))
+            continue
+        hand = synthetic_hand(POINTING, rng, jitter=0)
+        if any(start <= t - 10.0 < stop for start, stop in pinches):
+            hand[8, :2] = hand[4, :2]
+        controller.process_hands(hand[None], t, (640, 480))
+    return [(event[0], event[2]) for event in actions.events if event[1] == "hotkey"]
+
+
+def test_single_tap_waits_out_the_double_tap_window(bindings):
+    events = run_pinches(bindings, [(0.3, 0.4)])
+    assert [key for _, key in events] == ["space"]
+    assert events[0][0] > 0.3 + DOUBLE_TAP_WINDOW
+
+
+def test_double_tap_sends_only_the_double_tap(bindings):
+    assert [key for _, key in run_pinches(bindings, [(0.3, 0.4), (0.6, 0.7)])] == ["esc"]
+
+
+def test_tap_is_sent_after_the_hand_leaves(bindings):
+    assert [key for _, key in run_pinches(bindings, [(0.3, 0.4)], hand_leaves=0.45)] == ["space"]
+
+
+def test_double_tap_respects_the_cooldown(bindings):
+    events = run_pinches(bindings, [(0.3, 0.4), (0.6, 0.7), (1.0, 1.1), (1.3, 1.4)])
+    assert [key for _, key in events] == ["esc"]
+
+
+def test_without_double_tap_the_tap_is_immediate():
+    bindings = GestureBindings({"mappings": {"Tap": "space", "Double Tap": "None"}})
+    events = run_pinches(bindings, [(0.3, 0.4)])
+    assert [key for _, key in events] == ["space"]
+    assert events[0][0] < 0.4
@@ -0,0 +1,65 @@
+from governor import DEGRADE_HOLD, TIERS, UPGRADE_HOLD, QualityGovernor
+
+INTERVAL = 1 / 30
+
+
+def feed(governor, start, duration, processing_time):
+    # Frames at 30 fps, each taking `processing_time`; returns the time after the last one
+    t = start
+    for _ in range(int(duration / INTERVAL)):
+        t += INTERVAL
+        governor.observe_capture(t)
+        governor.observe(processing_time, t)
+    return t
+
+
+def test_degrades_after_the_hold():
+    governor = QualityGovernor()
+    t = feed(governor, 0.0, DEGRADE_HOLD * 0.5, 0.05)
+    assert governor.tier == 0
+    feed(governor, t, DEGRADE_HOLD, 0.05)
+    assert governor.tier == 1
+
+
+def test_load_between_the_marks_holds_the_tier():
+    governor = QualityGovernor(start_tier=1)
+    feed(governor, 0.0, UPGRADE_HOLD * 3, 0.7 * INTERVAL)
+    assert governor.tier == 1
+    assert governor.changes == 0
+
+
+def test_upgrade_needs_a_longer_hold_than_degrading():
+    governor = QualityGovernor(start_tier=1)
+    t = feed(governor, 0.0, DEGRADE_HOLD * 2, 0.2 * INTERVAL)
+    assert governor.tier == 1
+    feed(governor, t, UPGRADE_HOLD, 0.2 * INTERVAL)
+    assert governor.tier == 0
+
+
+def test_brief_spikes_do_not_flap():
+    governor = QualityGovernor()
+    t = 0.0
+    for _ in range(10):
+        t = feed(governor, t, DEGRADE_HOLD * 0.5, 0.05)
+        t = feed(governor, t, DEGRADE_HOLD * 0.5, 0.005)
+    assert governor.tier == 0
+    assert governor.changes == 0
+
+
+def test_failed_upgrade_doubles_the_hold():
+    governor = QualityGovernor(start_tier=1)
+    t = feed(governor, 0.0, UPGRADE_HOLD + 0.5, 0.2 * INTERVAL)
+    assert governor.tier == 0
+    # The upgrade does not hold
+    t = feed(governor, t, DEGRADE_HOLD + 0.5, 0.05)
+    assert governor.tier == 1
+    t = feed(governor, t, UPGRADE_HOLD + 0.5, 0.2 * INTERVAL)
+    assert governor.tier == 1
+    feed(governor, t, UPGRADE_HOLD, 0.2 * INTERVAL)
+    assert governor.tier == 0
+
+
+def test_never_past_the_last_tier():
+    governor = QualityGovernor()
+    feed(governor, 0.0, DEGRADE_HOLD * 2 * len(TIERS) + 5, 0.5)
+    assert governor.tier == len(TIERS) - 1
@@ -0,0 +1,55 @@
+import time
+from frame_buffers import FrameBuffer, FrameRing, FrameSlot
+from scheduler import InferencePool
+
+
+class Processor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.processed = 0
+
+    def process(self, item):
+        if self.fail:
+            raise ValueError("detector crashed")
+        self.processed += 1
+        item[2].release()
+
+
+class Stream:
+    def __init__(self, processor):
+        self.frame_slot = FrameSlot(retain=FrameBuffer.retain, release=FrameBuffer.release)
+        self.processor = processor
+
+
+def run_pool(streams, ring, frames=3, **options):
+    state = {"running": True}
+    pool = InferencePool(streams, lambda: state["running"], stop=lambda: state.update(running=False), **options)
+    pool.start()
+    for _ in range(frames):
+        for stream in streams:
+            buf = ring.acquire(timeout=1.0)
+            if buf is not None:
+                stream.frame_slot.publish(buf)
+        time.sleep(0.05)
+    state["running"] = False
+    pool.join()
+    for stream in streams:
+        stream.frame_slot.clear()
+    return pool, state
+
+
+def test_every_stream_is_served():
+    ring = FrameRing(size=6, width=8, height=6)
+    streams = [Stream(Processor()) for _ in range(3)]
+    pool, _ = run_pool(streams, ring, workers=2)
+    assert all(stream.processor.processed for stream in streams)
+    assert ring.free_count() == 6
+
+
+def test_failing_worker_releases_its_frames_and_stops_the_pipeline(capsys):
+    ring = FrameRing(size=6, width=8, height=6)
+    streams = [Stream(Processor()), Stream(Processor(fail=True))]
+    pool, state = run_pool(streams, ring, workers=1)
+    assert not state["running"]
+    assert "detector crashed" in capsys.readouterr().out
+    assert ring.free_count() == 6
@@ -0,0 +1,47 @@
+import pytest
+from gesture_engine import SWIPE_DISTANCE, SWIPE_SPEED, SWIPE_WINDOW
+from trajectory import TrajectoryBuffer, detect_swipe
+
+
+def sweep(fps, speed, duration=0.5, start=10.0, x0=0.2, dy=0.0):
+    # Fingertip moving at `speed` widths per second, sampled at `fps`
+    trajectory = TrajectoryBuffer()
+    t = start
+    for i in range(int(duration * fps) + 1):
+        t = start + i / fps
+        trajectory.add(t, x0 + speed * (t - start), 0.5 + dy * (t - start))
+    return trajectory, t
+
+
+def test_window_is_contiguous_after_wrapping():
+    trajectory = TrajectoryBuffer(size=8)
+    for i in range(20):
+        trajectory.add(float(i), i * 0.1, 0.0)
+    t, x, _ = trajectory.last(8)
+    assert list(t) == [float(i) for i in range(12, 20)]
+    assert x[-1] == pytest.approx(1.9)
+    t, _, _ = trajectory.window(19.0, 2.5)
+    assert list(t) == [17.0, 18.0, 19.0]
+
+
+@pytest.mark.parametrize("fps", [15, 30, 60, 120])
+def test_swipe_is_frame_rate_independent(fps):
+    trajectory, now = sweep(fps, 1.2)
+    assert detect_swipe(trajectory, now, SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED) == "right"
+    trajectory, now = sweep(fps, -1.2, x0=0.8)
+    assert detect_swipe(trajectory, now, SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED) == "left"
+    # Far enough, but too slow
+    trajectory, now = sweep(fps, 0.4, duration=1.0)
+    assert detect_swipe(trajectory, now, SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED) is None
+
+
+def test_mostly_vertical_movement_is_no_swipe():
+    trajectory, now = sweep(30, 1.2, dy=3.0)
+    assert detect_swipe(trajectory, now, SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED) is None
+
+
+def test_too_few_samples():
+    trajectory = TrajectoryBuffer()
+    trajectory.add(0.0, 0.1, 0.5)
+    trajectory.add(0.1, 0.9, 0.5)
+    assert detect_swipe(trajectory, 0.1, SWIPE_WINDOW, SWIPE_DISTANCE, SWIPE_SPEED) is None
@@ -0,0 +1,72 @@
+import numpy as np
+
+TRAJECTORY_SIZE = 128   # samples kept per hand; 2 s at 60 fps, enough for the custom gesture windows
+
+
+class TrajectoryBuffer:
+    """
+    Fixed-size ring of timestamped normalized fingertip positions for one
+    hand. Every sample is written twice, `size` rows apart, so the newest
+    samples are always one contiguous slice: no allocation or reordering
+    per sample. Rows are t, x and y so each is contiguous. `window`
+    returns the samples of the last `duration` seconds in time order for
+    vectorized checks.
+    """
+    def __init__(self, size=TRAJECTORY_SIZE):
+        self.size = size
+        self.samples = np.zeros((3, 2 * size), dtype=np.float64)   # t, x, y
+        self.count = 0
+        self.pos = 0
+
+    def add(self, t, x, y):
+        sample = (t, x, y)
+        self.samples[:, self.pos] = sample
+        self.samples[:, self.pos + self.size] = sample
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def last(self, count):
+        # (3, count) view of the newest samples, oldest first
+        count = min(count, self.count)
+        end = self.pos + self.size
+        return self.samples[:, end - count:end]
+
+    def window(self, now, duration):
+        """(3, n) samples with t >= now - duration, oldest first."""
+        samples = self.last(self.count)
+        return samples[:, int(samples[0].searchsorted(now - duration)):]
+
+
+def detect_swipe(trajectory, now, window, min_distance, min_speed, aspect=4 / 3, dominance=2.0):
+    """
+    "left", "right" or None for the movement in the last `window` seconds.
+    A swipe needs a horizontal displacement of at least `min_distance`
+    (normalized frame widths) at a mean speed of at least `min_speed`
+    widths per second, and mostly horizontal (`aspect` is width / height,
+    so vertical motion is compared in the same units). Because it is
+    measured over time rather than between two frames, the result does not
+    depend on the frame rate.
+    """
+    t, x, y = trajectory.window(now, window)
+    if len(t) < 3:
+        return None
+    # Most frames have no horizontal travel worth a look
+    if x.max() - x.min() < min_distance:
+        return None
+    # Strongest horizontal excursion from the window's start, so a swipe that has
+    # already begun to stop or come back still counts
+    dx = x - x[0]
+    peak = int(np.argmax(np.abs(dx)))
+    distance = dx[peak]
+    elapsed = t[peak] - t[0]
+    if abs(distance) < min_distance or elapsed <= 0:
+        return None
+    if abs(distance) / elapsed < min_speed:
+        return None
+    if abs(distance) < dominance * abs(y[peak] - y[0]) / aspect:
+        return None
+    return "right" if distance > 0 else "left"